@@ -0,0 +1 @@
+"""NoAuth benchmarks."""
@@ -0,0 +1,76 @@
+"""Run all benchmarks, optionally saving or comparing against a baseline.
+
+Usage:
+    python -m benchmarks [--quick] [--save FILE] [--compare FILE]
+"""
+
+import argparse
+import json
+from pathlib import Path
+import sys
+
+from benchmarks import bench_flow, bench_jwt, bench_signing, bench_store
+from benchmarks.common import Results
+
+SUITES = {
+    "jwt": bench_jwt,
+    "signing": bench_signing,
+    "store": bench_store,
+    "flow": bench_flow,
+}
+
+
+def compare(results: Results, baseline: Results, threshold: float) -> bool:
+    """Print results against a baseline; return False on any regression."""
+    ok = True
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:40} {value:10.2f} us/op   (new)")
+            continue
+        change = (value - base) / base
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"{name:40} {value:10.2f} us/op {change:+8.1%}{flag}")
+    return ok
+
+
+def main():
+    """Run benchmarks."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("suites", nargs="*", help=f"any of {', '.join(SUITES)}")
+    parser.add_argument("--quick", action="store_true", help="smaller iteration counts")
+    parser.add_argument("--save", type=Path, help="write results to a baseline file")
+    parser.add_argument("--compare", type=Path, help="compare against a baseline file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="fractional slowdown reported as a regression (default 0.1)",
+    )
+    args = parser.parse_args()
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    results: Results = {}
+    for suite in args.suites or SUITES:
+        results.update(SUITES[suite].run(quick=args.quick))
+
+    ok = True
+    if args.compare:
+        ok = compare(results, json.loads(args.compare.read_text()), args.threshold)
+    else:
+        for name, value in results.items():
+            print(f"{name:40} {value:10.2f} us/op")
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2) + "\n")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
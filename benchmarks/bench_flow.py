@@ -0,0 +1,111 @@
+"""In-process authorization code flow macrobenchmark.
+
+Runs authorize -> submit -> token against the FastAPI app through an ASGI
+transport and reports flows per second and p50/p99 latency per flow.
+
+Usage: python -m benchmarks.bench_flow
+"""
+
+import asyncio
+import json
+from pathlib import Path
+import re
+import shutil
+import tempfile
+from time import perf_counter
+import os
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+from benchmarks.common import Results, percentile
+
+ROOT = Path(__file__).parent.parent
+CONCURRENCY = 8
+
+
+async def flow(client: httpx.AsyncClient):
+    """Run one authorization code flow."""
+    response = await client.get(
+        "/oidc/authorize",
+        params={
+            "response_type": "code",
+            "client_id": "example",
+            "redirect_uri": "http://rp/callback",
+            "scope": "openid",
+            "state": "xyz",
+        },
+    )
+    match = re.search(r"/oidc/submit/([0-9a-f-]+)", response.text)
+    assert match, response.text
+    response = await client.post(
+        f"/oidc/submit/{match.group(1)}", data={"claims": json.dumps({"sub": "alice"})}
+    )
+    code = parse_qs(urlparse(response.headers["location"]).query)["code"][0]
+    response = await client.post(
+        "/oidc/token",
+        data={
+            "grant_type": "authorization_code",
+            "client_id": "example",
+            "client_secret": "supersecret",
+            "redirect_uri": "http://rp/callback",
+            "code": code,
+        },
+    )
+    assert response.status_code == 200, response.text
+
+
+async def bench(flows: int) -> Results:
+    """Run flows across CONCURRENCY workers."""
+    from noauth.main import app
+
+    latencies = []
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://noauth"
+        ) as client:
+            await flow(client)  # warm up
+
+            async def worker(n: int):
+                for _ in range(n):
+                    start = perf_counter()
+                    await flow(client)
+                    latencies.append(perf_counter() - start)
+
+            start = perf_counter()
+            await asyncio.gather(
+                *(worker(flows // CONCURRENCY) for _ in range(CONCURRENCY))
+            )
+            elapsed = perf_counter() - start
+
+    latencies.sort()
+    rate = len(latencies) / elapsed
+    print(f"flow: {rate:.1f} flows/s ({3 * rate:.1f} req/s)")
+    return {
+        "flow.mean": elapsed / len(latencies) * 1e6,
+        "flow.p50": percentile(latencies, 50) * 1e6,
+        "flow.p99": percentile(latencies, 99) * 1e6,
+    }
+
+
+def run(quick: bool = False) -> Results:
+    """Run the benchmark from a scratch directory holding the default config."""
+    cwd = os.getcwd()
+    # Static files are resolved relative to the working directory at import
+    os.chdir(ROOT)
+    import noauth.main  # noqa: F401
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(ROOT / "default.noauth.toml", Path(tmp) / "noauth.toml")
+        os.chdir(tmp)
+        try:
+            return asyncio.run(bench(200 if quick else 2000))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        print(f"{name:40} {value:10.2f} us/op")
@@ -0,0 +1,126 @@
+"""JWT signing microbenchmarks.
+
+Compares jwt.sign against a precomputed Signer for ES256 and EdDSA keys, and
+times encoding and decoding without the signature for a typical payload and one
+with a long roles list. Encoding is timed for the previous str pipeline and the
+bytes pipeline with each available JSON codec.
+
+Usage: python -m benchmarks.bench_jwt
+"""
+
+import base64
+import json
+from time import time
+from uuid import uuid4
+
+from aries_askar import Key, KeyAlg
+
+from benchmarks.common import Results, per_op_us
+from noauth import codec, jwt
+
+
+def payload(roles: int = 1) -> dict:
+    """Return a representative token payload."""
+    now = int(time())
+    return {
+        "exp": now + 300,
+        "iat": now,
+        "jti": str(uuid4()),
+        "iss": "http://noauth",
+        "given_name": "Alice",
+        "family_name": "Edwards",
+        "email": "alice@example.com",
+        "roles": ["admin"] if roles == 1 else [f"role-{n}" for n in range(roles)],
+    }
+
+
+def str_encode(value: str) -> str:
+    """Encode a segment as the str pipeline did."""
+    return base64.urlsafe_b64encode(value.encode()).strip(b"=").decode()
+
+
+def str_signing_input(enc_headers: str, value: dict) -> bytes:
+    """Build the signing input as the str pipeline did."""
+    enc_payload = str_encode(json.dumps(value, separators=(",", ":")))
+    return f"{enc_headers}.{enc_payload}".encode()
+
+
+def str_b64decode(value: str) -> bytes:
+    """Decode a segment as the str pipeline did."""
+    value += "=" * (-len(value) % 4)
+    return base64.urlsafe_b64decode(value)
+
+
+def str_decode(token: str) -> tuple:
+    """Decode a token as the str pipeline did."""
+    enc_headers, enc_payload, sig = token.split(".")
+    return (
+        json.loads(str_b64decode(enc_headers).decode()),
+        json.loads(str_b64decode(enc_payload).decode()),
+        str_b64decode(sig),
+    )
+
+
+def codecs() -> list:
+    """Return the names of the installed JSON codecs."""
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        return ["json"]
+    return ["json", "orjson"]
+
+
+def run(quick: bool = False) -> Results:
+    """Run the benchmark."""
+    number = 500 if quick else 5000
+    results: Results = {}
+
+    encoded = json.dumps(payload(), separators=(",", ":")).encode()
+    results["base64_urlencode_no_padding"] = per_op_us(
+        lambda: jwt.base64_urlencode_no_padding(encoded), number * 10
+    )
+
+    selected = codec.NAME
+    signer = jwt.Signer(Key.generate(KeyAlg.ED25519), "EdDSA")
+    try:
+        for roles in (1, 1000):
+            value = payload(roles)
+            token = signer.sign(value)
+            count = number * 10 if roles == 1 else number
+            results[f"encode[roles={roles},str]"] = per_op_us(
+                lambda: str_signing_input(signer.enc_headers, value), count
+            )
+            results[f"decode[roles={roles},str]"] = per_op_us(
+                lambda: str_decode(token), count
+            )
+            for name in codecs():
+                codec.use(name)
+                results[f"encode[roles={roles},{name}]"] = per_op_us(
+                    lambda: signer.signing_input(value), count
+                )
+                results[f"decode[roles={roles},{name}]"] = per_op_us(
+                    lambda: jwt.decode(token), count
+                )
+    finally:
+        codec.use(selected)
+
+    for alg, key_alg in (("ES256", KeyAlg.P256), ("EdDSA", KeyAlg.ED25519)):
+        key = Key.generate(key_alg)
+        signer = jwt.Signer(key, alg)
+
+        def uncached():
+            jwt.sign(
+                headers={"alg": alg, "kid": key.get_jwk_thumbprint()},
+                payload=payload(),
+                key=key,
+            )
+
+        results[f"jwt.sign[{alg}]"] = per_op_us(uncached, number)
+        results[f"Signer.sign[{alg}]"] = per_op_us(lambda: signer.sign(payload()), number)
+
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        print(f"{name:40} {value:10.2f} us/op")
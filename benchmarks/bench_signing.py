@@ -0,0 +1,54 @@
+"""Signing executor throughput under concurrent load.
+
+Signs a burst of ES256 tokens concurrently with each executor kind and an
+increasing number of workers, to show throughput scaling with core count.
+
+Usage: python -m benchmarks.bench_signing
+"""
+
+import asyncio
+import os
+from time import perf_counter
+
+from aries_askar import Key, KeyAlg
+
+from benchmarks.bench_jwt import payload
+from benchmarks.common import Results
+from noauth.jwt import Signer
+from noauth.signing import SigningExecutor
+
+
+async def burst(executor: SigningExecutor, signer: Signer, tokens: int) -> float:
+    """Return microseconds per token for a concurrent burst."""
+    await asyncio.gather(*(executor.sign(signer, payload()) for _ in range(64)))  # warm
+    start = perf_counter()
+    await asyncio.gather(*(executor.sign(signer, payload()) for _ in range(tokens)))
+    return (perf_counter() - start) / tokens * 1e6
+
+
+def run(quick: bool = False) -> Results:
+    """Run the benchmark."""
+    tokens = 2000 if quick else 20000
+    signer = Signer(Key.generate(KeyAlg.P256), "ES256")
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, cores} if cores > 1 else {1})
+
+    results: Results = {}
+    configs = [("inline", None)] + [
+        (kind, workers) for kind in ("thread", "process") for workers in worker_counts
+    ]
+    for kind, workers in configs:
+        executor = SigningExecutor(kind, workers)  # type: ignore[arg-type]
+        try:
+            us = asyncio.run(burst(executor, signer, tokens))
+        finally:
+            executor.close()
+        name = f"signing[{kind}]" if workers is None else f"signing[{kind}x{workers}]"
+        print(f"{name}: {1e6 / us:.0f} tokens/s")
+        results[name] = us
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        print(f"{name:40} {value:10.2f} us/op")
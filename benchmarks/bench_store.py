@@ -0,0 +1,97 @@
+"""TemporalKVStore microbenchmarks at increasing key counts.
+
+Compares the heap and timing wheel expiry engines with a mix of 30s code
+and 300s token TTLs, and with a full store whose TTLs spread up to the 24h
+refresh token TTL so the wheel holds a bucket for nearly every tick.
+
+Usage: python -m benchmarks.bench_store
+"""
+
+import asyncio
+from time import perf_counter, time
+
+from benchmarks.common import Results
+from noauth.store import TemporalKVStore, TimingWheelKVStore
+
+SIZES = (10_000, 100_000, 1_000_000)
+QUICK_SIZES = (10_000,)
+ENGINES = {"heap": TemporalKVStore, "wheel": TimingWheelKVStore}
+
+
+async def bench_size(engine: str, size: int) -> Results:
+    """Time set, get, delete and expiry of size keys."""
+    kv = await ENGINES[engine]().open()
+    keys = [f"oidc:{i}" for i in range(size)]
+    ttls = [30.0 + i % 10 if i % 2 else 300.0 + i % 10 for i in range(size)]
+
+    start = perf_counter()
+    for key, ttl in zip(keys, ttls):
+        await kv.set(key, key, ttl)
+    set_us = (perf_counter() - start) / size * 1e6
+
+    start = perf_counter()
+    for key in keys:
+        await kv.get(key)
+    get_us = (perf_counter() - start) / size * 1e6
+
+    deleted = keys[::4]
+    start = perf_counter()
+    for key in deleted:
+        await kv.delete(key)
+    delete_us = (perf_counter() - start) / len(deleted) * 1e6
+
+    # Expire everything in one pass as if the clock had jumped past every TTL
+    start = perf_counter()
+    kv._expire(time() + 7200)
+    expire_us = (perf_counter() - start) / size * 1e6
+    assert not kv.store
+
+    await kv.close()
+    return {
+        f"store.set[{engine},{size}]": set_us,
+        f"store.get[{engine},{size}]": get_us,
+        f"store.delete[{engine},{size}]": delete_us,
+        f"store.expire[{engine},{size}]": expire_us,
+    }
+
+
+async def bench_full(engine: str, size: int) -> Results:
+    """Time set with eviction and per-tick expiry wakes on a full store."""
+    kv = await ENGINES[engine](max_entries=size).open()
+    for i in range(size):
+        await kv.set(f"oidc:refresh:{i}", i, 60.0 + i * 86400 / size)
+
+    number = 10_000
+    start = perf_counter()
+    for i in range(number):
+        await kv.set(f"oidc:flow:{i}", i, 30.0 + i % 300)
+    set_us = (perf_counter() - start) / number * 1e6
+
+    # Wake as the expiry loop does once per tick, with nothing due yet
+    now = time()
+    start = perf_counter()
+    for i in range(number):
+        kv._expire(now + i * 1e-4)
+        kv._next_expiry()
+    expire_us = (perf_counter() - start) / number * 1e6
+
+    await kv.close()
+    return {
+        f"store.set_full[{engine},{size}]": set_us,
+        f"store.wake_full[{engine},{size}]": expire_us,
+    }
+
+
+def run(quick: bool = False) -> Results:
+    """Run the benchmark."""
+    results: Results = {}
+    for size in QUICK_SIZES if quick else SIZES:
+        for engine in ENGINES:
+            results.update(asyncio.run(bench_size(engine, size)))
+            results.update(asyncio.run(bench_full(engine, size)))
+    return results
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        print(f"{name:40} {value:10.2f} us/op")
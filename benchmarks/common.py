@@ -0,0 +1,18 @@
+"""Benchmark helpers."""
+
+import timeit
+from typing import Callable, Dict
+
+# Benchmark results map a name to microseconds per operation; lower is better
+Results = Dict[str, float]
+
+
+def per_op_us(fn: Callable[[], object], number: int, repeat: int = 3) -> float:
+    """Return the best time per call of fn in microseconds."""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Return the pct percentile of already sorted values."""
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index]
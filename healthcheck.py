@@ -1,13 +1,41 @@
 #!/usr/bin/env python
-"""Healthcheck."""
+"""Healthcheck.
 
+By default, checks that the port accepts TCP connections. With --http, checks
+/readyz instead, failing while the event loop lags more than --max-lag seconds
+or the store has stopped expiring entries.
+"""
+
+import argparse
 import socket
 import sys
+from urllib.error import URLError
+from urllib.request import urlopen
+
+parser = argparse.ArgumentParser(prog="python healthcheck.py")
+parser.add_argument("host")
+parser.add_argument("port", type=int)
+parser.add_argument("--http", action="store_true", help="check /readyz over HTTP")
+parser.add_argument("--max-lag", type=float, help="event loop lag threshold (seconds)")
+parser.add_argument("--timeout", type=float, default=5.0)
+args = parser.parse_args()
 
-if len(sys.argv) < 3:
-    print("USAGE: python healthcheck.py <HOST> <PORT>")
+if not args.http:
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sys.exit(s.connect_ex((args.host, args.port)))
 
-host = sys.argv[1]
-port = int(sys.argv[2])
-s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-sys.exit(s.connect_ex((host, port)))
+url = f"http://{args.host}:{args.port}/readyz"
+if args.max_lag is not None:
+    url += f"?max_lag={args.max_lag}"
+try:
+    with urlopen(url, timeout=args.timeout) as response:
+        print(response.read().decode())
+        sys.exit(0)
+except URLError as err:
+    # HTTPError carries the report of an unavailable instance
+    body = getattr(err, "read", None)
+    print(body().decode() if body else err)
+    sys.exit(1)
+except OSError as err:
+    print(err)
+    sys.exit(1)
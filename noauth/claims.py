@@ -0,0 +1,45 @@
+"""Scope to claims resolution."""
+
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+
+class ScopeClaims:
+    """Resolve the claims for a scope string.
+
+    Scopes are normalized to the distinct configured scopes in config order, so
+    repeated, reordered or oddly spaced scope strings share one cache entry and
+    merge the same way. Merged claims are computed once per normalized scope set
+    and held as read-only mappings; callers get a shallow copy.
+    """
+
+    def __init__(
+        self,
+        default_user: Dict[str, Any],
+        scopes: Optional[Dict[str, Any]],
+        maxsize: int = 256,
+    ):
+        """Initialize the resolver."""
+        self.default_user = default_user
+        self.scopes = scopes or {}
+        self._order = {scope: index for index, scope in enumerate(self.scopes)}
+        self._merged = lru_cache(maxsize=maxsize)(self._merge)
+
+    def normalize(self, scope: str) -> Tuple[str, ...]:
+        """Return the distinct configured scopes in config order."""
+        order = self._order
+        return tuple(
+            sorted({scp for scp in scope.split() if scp in order}, key=order.get)
+        )
+
+    def _merge(self, scopes: Tuple[str, ...]) -> Mapping[str, Any]:
+        """Merge default claims with the claims of each scope."""
+        claims = dict(self.default_user)
+        for scp in scopes:
+            claims.update(self.scopes[scp])
+        return MappingProxyType(claims)
+
+    def __call__(self, scope: str) -> Dict[str, Any]:
+        """Return the claims for a scope string."""
+        return dict(self._merged(self.normalize(scope)))
@@ -0,0 +1,64 @@
+"""JSON codec.
+
+Tokens and token endpoint responses are serialized straight to bytes. orjson is
+used when installed, otherwise the standard library; NOAUTH_JSON=json forces the
+standard library.
+"""
+
+import json
+from os import getenv
+from typing import Any, Callable, Union
+
+from fastapi import Response
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _json_loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    # json.loads sniffs the encoding of bytes; tokens are always UTF-8
+    if not isinstance(data, str):
+        data = str(data, "utf-8")
+    return _JSON_DECODER.decode(data)
+
+
+NAME = "json"
+dumps: Callable[[Any], bytes] = _json_dumps
+loads: Callable[[Union[str, bytes, bytearray, memoryview]], Any] = _json_loads
+
+
+def use(name: str):
+    """Select the codec by name, "orjson" or "json"."""
+    global NAME, dumps, loads
+
+    if name == "orjson":
+        import orjson
+
+        def _orjson_dumps(value: Any) -> bytes:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+        NAME, dumps, loads = "orjson", _orjson_dumps, orjson.loads
+    elif name == "json":
+        NAME, dumps, loads = "json", _json_dumps, _json_loads
+    else:
+        raise ValueError(f"Unknown JSON codec: {name}")
+
+
+try:
+    use(getenv("NOAUTH_JSON", "orjson"))
+except ImportError:
+    use("json")
+
+
+class CodecJSONResponse(Response):
+    """JSON response rendered with the selected codec."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        """Render content to bytes."""
+        return dumps(content)
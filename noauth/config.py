@@ -2,38 +2,270 @@
 
 from os import getenv
 from pathlib import Path
+import re
 import tomllib
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+from urllib.parse import urlsplit, urlunsplit
 
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, PrivateAttr, ValidationError, model_validator
 
 
 class OIDCConfig(BaseModel):
     """OIDC Configuration parameters."""
 
     issuer: str
+    cache_max_age: int = 300
+    # Issue refresh tokens when offline_access is requested, always, or never
+    refresh_tokens: Literal["offline_access", "always", "never"] = "offline_access"
+    refresh_token_ttl: int = 86400
+
+
+_RedirectURIPattern = Tuple[str, re.Pattern, re.Pattern, re.Pattern]
+
+
+def _split_authority(netloc: str) -> Tuple[str, str]:
+    """Split a netloc into a lowercase host and a port string."""
+    host, sep, port = netloc.rpartition(":")
+    if not sep or "]" in port:
+        return netloc.lower(), ""
+    return host.lower(), port
+
+
+def _compile_redirect_uri(pattern: str) -> _RedirectURIPattern:
+    """Compile a redirect_uri pattern into per-component matchers.
+
+    In the host * matches within a single label and in the port only digits, so
+    a wildcard can never reach into userinfo or another domain. In the path and
+    query * matches anything; every other character, ? included, is literal.
+    """
+    parts = urlsplit(pattern)
+    host, port = _split_authority(parts.netloc)
+    rest = urlunsplit(("", "", parts.path, parts.query, ""))
+    return (
+        parts.scheme.lower(),
+        re.compile(re.escape(host).replace(r"\*", "[^.:@]*") + r"\Z"),
+        re.compile(re.escape(port).replace(r"\*", "[0-9]*") + r"\Z"),
+        re.compile(re.escape(rest).replace(r"\*", ".*") + r"\Z"),
+    )
 
 
 class ClientConfig(BaseModel):
-    """OIDC Client configuration."""
+    """OIDC Client configuration.
+
+    redirect_uris are patterns with * wildcards (e.g. "http://localhost:*/callback")
+    compiled once at load. The scheme, host, port and path are matched
+    separately; redirect_uris with userinfo or a fragment are always rejected.
+    With none configured, any redirect_uri is accepted. default claims, if set,
+    are layered over the global defaults.
+    """
 
-    client_id: str
+    client_id: Optional[str] = None
     client_secret: str
-    id_token_signed_response_alg: str
+    id_token_signed_response_alg: str = "ES256"
+    # Skip the claims form and redirect straight back with a code
+    headless: bool = False
+    redirect_uris: List[str] = []
+    default: Optional[Dict[str, Any]] = None
 
+    _redirect_uri_patterns: Optional[List[_RedirectURIPattern]] = PrivateAttr(None)
 
-class NoAuthConfig(BaseModel):
-    """NoAuth Service Config.
+    def model_post_init(self, context: Any):
+        """Compile redirect_uri patterns."""
+        if self.redirect_uris:
+            self._redirect_uri_patterns = [
+                _compile_redirect_uri(uri) for uri in self.redirect_uris
+            ]
 
-    Configuration must be loaded from a file.
-    By default, noauth.toml or NOAUTH_CONFIG is read.
+    def allows_redirect_uri(self, redirect_uri: str) -> bool:
+        """Check a redirect_uri against the configured patterns."""
+        if self._redirect_uri_patterns is None:
+            return True
+        try:
+            parts = urlsplit(redirect_uri)
+        except ValueError:
+            return False
+        if "@" in parts.netloc or "#" in redirect_uri:
+            return False
+        host, port = _split_authority(parts.netloc)
+        rest = urlunsplit(("", "", parts.path, parts.query, ""))
+        return any(
+            parts.scheme.lower() == scheme
+            and host_re.match(host)
+            and port_re.match(port)
+            and rest_re.match(rest)
+            for scheme, host_re, port_re, rest_re in self._redirect_uri_patterns
+        )
+
+
+class KeyConfig(BaseModel):
+    """Signing key configuration.
+
+    Without a path, a new key is generated at every startup. With a path, the key
+    is loaded from that JWK file or generated once and saved there, so all
+    workers and restarts sign with the same kid.
+    """
+
+    path: Optional[str] = None
+
+
+class LoggingConfig(BaseModel):
+    """Logging configuration.
+
+    NOAUTH_LOG_LEVEL and NOAUTH_LOG_FORMAT override these when set.
+    """
+
+    level: Optional[str] = None
+    format: Optional[Literal["text", "json"]] = None
+
+
+class ReloadConfig(BaseModel):
+    """Config reload configuration.
+
+    SIGHUP always reloads the config; with watch set, the file is also polled for
+    changes every interval seconds.
+    """
+
+    watch: bool = False
+    interval: float = 2.0
+
+
+class SigningConfig(BaseModel):
+    """JWT signing configuration.
+
+    Sign inline on the event loop, or on a thread or process pool of workers
+    (default: one per core). Changes take effect on restart.
+    """
+
+    executor: Literal["inline", "thread", "process"] = "inline"
+    workers: Optional[int] = None
+    batch_size: int = 32
+
+
+class StoreConfig(BaseModel):
+    """Flow state store configuration.
+
+    The memory backend is confined to one process; use the sqlite backend to run
+    with multiple workers.
+    """
+
+    backend: Literal["memory", "sqlite"] = "memory"
+    # Memory backend expiry engine: a heap, or a timing wheel with tick seconds
+    expiry: Literal["heap", "wheel"] = "heap"
+    tick: float = 1.0
+    path: str = "/var/lib/noauth/store.db"
+    sweep_interval: float = 5.0
+    max_entries: Optional[int] = None
+    max_bytes: Optional[int] = None
+    eviction: Literal["expiry", "lru"] = "expiry"
+    compact_threshold: float = 0.5
+
+
+class HealthConfig(BaseModel):
+    """Health check configuration.
+
+    Event loop lag is sampled every sample_interval seconds; /readyz reports
+    unavailable once it exceeds max_lag seconds.
+    """
+
+    sample_interval: float = 0.5
+    max_lag: float = 1.0
+
+
+class DebugConfig(BaseModel):
+    """Debug endpoint configuration.
+
+    /debug/profile and /debug/memory are served only when enabled, and only to
+    requests bearing token.
+    """
+
+    enabled: bool = False
+    token: Optional[str] = None
+    max_seconds: float = 60.0
+    sample_interval: float = 0.005
+    tracemalloc_frames: int = 8
+
+    @model_validator(mode="after")
+    def require_token(self) -> "DebugConfig":
+        """Refuse to enable the debug endpoints without a token."""
+        if self.enabled and not self.token:
+            raise ValueError("[noauth.debug] requires a token when enabled")
+        return self
+
+
+class TokenCacheConfig(BaseModel):
+    """Manual API token reuse configuration.
+
+    When enabled, /manual/api/token returns the previously signed token for
+    identical claims while more than min_remaining of its lifetime is left.
+    Requests may opt in or out with the reuse parameter.
+    """
+
+    enabled: bool = False
+    max_entries: int = 1024
+    min_remaining: float = 0.5
+
+
+class TenantConfig(BaseModel):
+    """Issuer configuration.
+
+    The top level of the config is the default issuer; each of
+    [noauth.tenants.<name>] is another issuer served under /t/<name>.
     """
 
     oidc: OIDCConfig
-    client: ClientConfig
+    client: Optional[ClientConfig] = None
+    clients: Dict[str, ClientConfig] = {}
     default: Dict[str, Any]
     token: Optional[Dict[str, Any]] = None
     scopes: Optional[Dict[str, Any]] = None
+    key: KeyConfig = KeyConfig()
+
+    @model_validator(mode="after")
+    def index_clients(self) -> "TenantConfig":
+        """Index every client by client_id, including the single [noauth.client]."""
+        for client_id, client in self.clients.items():
+            if client.client_id is None:
+                client.client_id = client_id
+            elif client.client_id != client_id:
+                raise ValueError(f"client_id of [noauth.clients.{client_id}] differs")
+        if self.client:
+            if not self.client.client_id:
+                raise ValueError("client_id missing from [noauth.client]")
+            self.clients.setdefault(self.client.client_id, self.client)
+        if not self.clients:
+            raise ValueError("at least one client must be configured")
+        return self
+
+    @property
+    def default_client(self) -> ClientConfig:
+        """Return [noauth.client], or else the first configured client."""
+        return self.client or next(iter(self.clients.values()))
+
+    @property
+    def signing_algs(self) -> List[str]:
+        """Return the distinct signing algs in use, the default client's first."""
+        algs = [self.default_client.id_token_signed_response_alg]
+        for client in self.clients.values():
+            if client.id_token_signed_response_alg not in algs:
+                algs.append(client.id_token_signed_response_alg)
+        return algs
+
+
+class NoAuthConfig(TenantConfig):
+    """NoAuth Service Config.
+
+    Configuration must be loaded from a file.
+    By default, noauth.toml or NOAUTH_CONFIG is read.
+    """
+
+    logging: LoggingConfig = LoggingConfig()
+    reload: ReloadConfig = ReloadConfig()
+    signing: SigningConfig = SigningConfig()
+    store: StoreConfig = StoreConfig()
+    token_cache: TokenCacheConfig = TokenCacheConfig()
+    health: HealthConfig = HealthConfig()
+    debug: DebugConfig = DebugConfig()
+    tenants: Dict[str, TenantConfig] = {}
 
     @classmethod
     def load(cls, path: Union[str, Path, None] = None) -> "NoAuthConfig":
@@ -0,0 +1,75 @@
+"""Debug endpoints.
+
+Off by default. While disabled, every path under /debug is a 404 and no
+profiling or allocation tracing takes place.
+"""
+
+import asyncio
+from hmac import compare_digest
+import threading
+import tracemalloc
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from noauth import profiling
+from noauth.codec import CodecJSONResponse
+from noauth.config import NoAuthConfig
+from noauth.dependencies import config, store
+from noauth.oidc import bearer_token
+from noauth.store import Store
+
+
+async def authorized(request: Request, config: NoAuthConfig = Depends(config)):
+    """Allow only requests bearing the debug token, and only when enabled."""
+    if not config.debug.enabled or not config.debug.token:
+        raise HTTPException(404)
+    if not compare_digest(bearer_token(request).encode(), config.debug.token.encode()):
+        raise HTTPException(401, "invalid token", headers={"WWW-Authenticate": "Bearer"})
+
+
+router = APIRouter(
+    prefix="/debug", dependencies=[Depends(authorized)], include_in_schema=False
+)
+_profiling = asyncio.Lock()
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10.0, gt=0),
+    config: NoAuthConfig = Depends(config),
+):
+    """Sample the event loop thread for seconds and return collapsed stacks."""
+    if _profiling.locked():
+        raise HTTPException(409, "a profile is already running")
+    async with _profiling:
+        stacks = await asyncio.get_running_loop().run_in_executor(
+            None,
+            profiling.sample_stacks,
+            threading.get_ident(),
+            min(seconds, config.debug.max_seconds),
+            config.debug.sample_interval,
+        )
+    return PlainTextResponse(profiling.render_collapsed(stacks))
+
+
+@router.get("/memory", response_class=CodecJSONResponse)
+async def memory(
+    limit: int = Query(20, gt=0),
+    stop: Optional[bool] = Query(None),
+    store: Store = Depends(store),
+    config: NoAuthConfig = Depends(config),
+):
+    """Report top allocators, split into the store and everything else.
+
+    Tracing starts on the first request, which reports nothing yet; stop=true
+    stops tracing.
+    """
+    if stop:
+        tracemalloc.stop()
+        return CodecJSONResponse({"tracing": False})
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(config.debug.tracemalloc_frames)
+        return CodecJSONResponse({"tracing": True}, status_code=202)
+    return CodecJSONResponse({"tracing": True, **profiling.memory_report(store, limit)})
@@ -1,81 +1,329 @@
 """Common dependencies."""
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field
 import logging
 from pathlib import Path
-from aries_askar import Key, KeyAlg
-from fastapi import FastAPI
+import signal
+from typing import Dict, Optional, Tuple
 
-from noauth.config import NoAuthConfig
-from noauth.store import TemporalKVStore
+from aries_askar import Key
+from fastapi import Depends, FastAPI, HTTPException, Request
+
+from noauth.claims import ScopeClaims
+from noauth.config import NoAuthConfig, TenantConfig
+from noauth import documents, log, startup
+from noauth.documents import CachedDocument
+from noauth.health import LagSampler
+from noauth.jwt import Signer
+from noauth.keys import load_or_generate_key
+from noauth.signing import SigningExecutor
+from noauth.sqlite_store import SQLiteKVStore
+from noauth.token_cache import TokenCache
+from noauth.store import PrefixedStore, Store, TemporalKVStore, TimingWheelKVStore
 
 
 LOGGER = logging.getLogger(__name__)
+CONFIG_PATH = Path("./noauth.toml")
+
+
+@dataclass(frozen=True)
+class State:
+    """Config and everything derived from it.
+
+    A state is never modified; a reload builds a new one and swaps it in. Each
+    request resolves the state once, so in-flight requests finish on the config
+    they started with.
+
+    The root state holds one state per tenant, indexed by name.
+    """
+
+    config: TenantConfig
+    key: Key
+    signer: Signer
+    signers: Dict[str, Signer]
+    key_sources: Dict[Tuple[str, Optional[str]], Key]
+    default_user: dict
+    default_token: dict
+    scope_claims: ScopeClaims
+    client_scope_claims: Dict[str, ScopeClaims]
+    discovery: CachedDocument
+    jwks: CachedDocument
+    tenant: Optional[str] = None
+    tenants: Dict[str, "State"] = field(default_factory=dict)
+
+    @classmethod
+    def build(
+        cls,
+        config: TenantConfig,
+        previous: Optional["State"] = None,
+        tenant: Optional[str] = None,
+    ) -> "State":
+        """Build state from config, reusing previous keys if they still apply.
+
+        One key is held per signing alg in use. The default client's alg uses
+        key.path as is; other algs insert the alg before its suffix.
+        """
+        tenants = {}
+        if isinstance(config, NoAuthConfig):
+            previous_tenants = previous.tenants if previous else {}
+            tenants = {
+                name: cls.build(tenant_config, previous_tenants.get(name), name)
+                for name, tenant_config in config.tenants.items()
+            }
+
+        algs = config.signing_algs
+        previous_keys = previous.key_sources if previous else {}
+        key_sources: Dict[Tuple[str, Optional[str]], Key] = {}
+        keys: Dict[str, Key] = {}
+        for alg in algs:
+            path = key_path(config.key.path, alg, primary=alg == algs[0])
+            key = previous_keys.get((alg, path))
+            if key is None:
+                LOGGER.debug("Loading key for %s", alg)
+                key = load_or_generate_key(path, alg)
+            keys[alg] = key_sources[(alg, path)] = key
+
+        signers = {alg: Signer(key, alg) for alg, key in keys.items()}
+        scope_claims = ScopeClaims(config.default, config.scopes)
+        return cls(
+            config=config,
+            key=keys[algs[0]],
+            signer=signers[algs[0]],
+            signers=signers,
+            key_sources=key_sources,
+            default_user=config.default,
+            default_token=config.token or {},
+            scope_claims=scope_claims,
+            client_scope_claims={
+                client_id: ScopeClaims(
+                    {**config.default, **client.default}, config.scopes
+                )
+                if client.default
+                else scope_claims
+                for client_id, client in config.clients.items()
+            },
+            discovery=documents.openid_configuration(config),
+            jwks=documents.jwks(keys.values(), config),
+            tenant=tenant,
+            tenants=tenants,
+        )
+
+
+def key_path(path: Optional[str], alg: str, primary: bool) -> Optional[str]:
+    """Return where the key for alg is persisted, if anywhere."""
+    if not path or primary:
+        return path
+    base = Path(path)
+    return str(base.with_name(f"{base.stem}.{alg}{base.suffix}"))
+
 
+_store: Store
+_signing: SigningExecutor
+_state: State
+_token_cache: TokenCache
+_lag_sampler: LagSampler
 
-_store: TemporalKVStore
-_default_user: dict
-_default_token: dict
-_config: NoAuthConfig
-_key: Key
 
+async def signing() -> SigningExecutor:
+    """Return signing executor."""
+    global _signing
+    return _signing
 
-def store() -> TemporalKVStore:
-    """Return store."""
+
+async def token_cache() -> TokenCache:
+    """Return manual API token cache."""
+    global _token_cache
+    return _token_cache
+
+
+async def lag_sampler() -> LagSampler:
+    """Return event loop lag sampler."""
+    global _lag_sampler
+    return _lag_sampler
+
+
+async def state(request: Request) -> State:
+    """Return the current state, or that of the tenant in the path."""
+    global _state
+    tenant = request.path_params.get("tenant")
+    if tenant is None:
+        return _state
+    tenant_state = _state.tenants.get(tenant)
+    if tenant_state is None:
+        raise HTTPException(404, "Unknown tenant")
+    return tenant_state
+
+
+async def store(state: State = Depends(state)) -> Store:
+    """Return store, namespaced per tenant."""
     global _store
-    return _store
+    if state.tenant is None:
+        return _store
+    return PrefixedStore(_store, f"t:{state.tenant}:")
 
 
-def default_user() -> dict:
+async def default_user(state: State = Depends(state)) -> dict:
     """Return default_user."""
-    global _default_user
-    return _default_user
+    return state.default_user
 
 
-def default_token() -> dict:
+async def default_token(state: State = Depends(state)) -> dict:
     """Return default_token."""
-    global _default_token
-    return _default_token
+    return state.default_token
 
 
-def config() -> NoAuthConfig:
+async def config(state: State = Depends(state)) -> TenantConfig:
     """Return config."""
-    global _config
-    return _config
+    return state.config
 
 
-def key() -> Key:
+async def key(state: State = Depends(state)) -> Key:
     """Return key."""
-    global _key
-    return _key
+    return state.key
+
+
+async def signer(state: State = Depends(state)) -> Signer:
+    """Return signer."""
+    return state.signer
+
+
+async def discovery(state: State = Depends(state)) -> CachedDocument:
+    """Return discovery document."""
+    return state.discovery
+
+
+async def jwks(state: State = Depends(state)) -> CachedDocument:
+    """Return JWKS document."""
+    return state.jwks
+
+
+async def scope_claims(state: State = Depends(state)) -> ScopeClaims:
+    """Return scope claims resolver."""
+    return state.scope_claims
+
+
+async def client_scope_claims(state: State = Depends(state)) -> Dict[str, ScopeClaims]:
+    """Return scope claims resolvers by client_id."""
+    return state.client_scope_claims
+
+
+async def signers(state: State = Depends(state)) -> Dict[str, Signer]:
+    """Return signers by alg."""
+    return state.signers
+
+
+async def open_store(config: NoAuthConfig) -> Store:
+    """Open the configured store backend."""
+    if config.store.backend == "sqlite":
+        return await SQLiteKVStore(
+            config.store.path, sweep_interval=config.store.sweep_interval
+        ).open()
+
+    options = {
+        "max_entries": config.store.max_entries,
+        "max_bytes": config.store.max_bytes,
+        "eviction": config.store.eviction,
+        "compact_threshold": config.store.compact_threshold,
+    }
+    if config.store.expiry == "wheel":
+        return await TimingWheelKVStore(tick=config.store.tick, **options).open()
+    return await TemporalKVStore(**options).open()
+
+
+def configure_logging(config: NoAuthConfig):
+    """Apply logging config, if any."""
+    if config.logging.level or config.logging.format:
+        log.configure(config.logging.level, config.logging.format)
+
+
+def reload() -> bool:
+    """Reload config from CONFIG_PATH and swap in the new state.
+
+    An invalid config is logged and the current state kept. The store backend is
+    not changed by a reload.
+    """
+    global _state
+
+    try:
+        config = NoAuthConfig.load(CONFIG_PATH)
+        new_state = State.build(config, _state)
+    except Exception:
+        LOGGER.exception("Failed to reload config; keeping current config")
+        return False
+
+    configure_logging(config)
+    _state = new_state
+    LOGGER.info("Reloaded config from %s", CONFIG_PATH)
+    return True
+
+
+def _mtime() -> Optional[float]:
+    """Return the config file modification time."""
+    try:
+        return CONFIG_PATH.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+
+async def watch_config(interval: float):
+    """Reload config whenever the file modification time changes."""
+    last = _mtime()
+    while True:
+        await asyncio.sleep(interval)
+        current = _mtime()
+        if current != last:
+            last = current
+            reload()
 
 
 @asynccontextmanager
 async def setup(app: FastAPI):
     """Setup context."""
     global _store
-    global _default_user
-    global _default_token
-    global _config
-    global _key
-
-    _config = NoAuthConfig.load("./noauth.toml")
-    store_path = Path("/var/lib/noauth/store.db")
-    store_path.parent.mkdir(parents=True, exist_ok=True)
-    _store = await TemporalKVStore().open()
-
-    LOGGER.debug(
-        "id_token_signed_response_alg: %s", _config.client.id_token_signed_response_alg
+    global _signing
+    global _state
+    global _token_cache
+    global _lag_sampler
+
+    with startup.phase("config"):
+        config = NoAuthConfig.load(CONFIG_PATH)
+        configure_logging(config)
+    with startup.phase("store"):
+        _store = await open_store(config)
+    with startup.phase("signing"):
+        _signing = SigningExecutor(
+            config.signing.executor, config.signing.workers, config.signing.batch_size
+        )
+    with startup.phase("keys"):
+        _state = State.build(config)
+    _token_cache = TokenCache(
+        config.token_cache.max_entries, config.token_cache.min_remaining
     )
-    if _config.client.id_token_signed_response_alg == "ES256":
-        _key = Key.generate(KeyAlg.P256)
-    else:
-        _key = Key.generate(KeyAlg.ED25519)
 
-    _default_user = _config.default
-    _default_token = _config.token or {}
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGHUP, reload)
+    except (NotImplementedError, RuntimeError, ValueError):
+        # Not on the main thread or not supported on this platform
+        LOGGER.debug("SIGHUP reload unavailable")
+
+    watcher = None
+    if config.reload.watch:
+        watcher = asyncio.create_task(watch_config(config.reload.interval))
 
+    _lag_sampler = LagSampler(config.health.sample_interval).start()
+    startup.ready()
     try:
         yield
     finally:
+        if watcher:
+            watcher.cancel()
+            with suppress(asyncio.CancelledError):
+                await watcher
+        with suppress(NotImplementedError, RuntimeError, ValueError):
+            loop.remove_signal_handler(signal.SIGHUP)
+        await _lag_sampler.stop()
         await _store.close()
+        _signing.close()
@@ -0,0 +1,95 @@
+"""Pre-serialized discovery and JWKS documents."""
+
+from dataclasses import asdict, dataclass
+import hashlib
+import json
+from typing import Iterable, List
+
+from aries_askar import Key
+from fastapi import Request, Response
+
+from noauth.config import TenantConfig
+
+
+@dataclass
+class OpenIDConfiguration:
+    """OpenID Config."""
+
+    issuer: str
+    authorization_endpoint: str
+    token_endpoint: str
+    userinfo_endpoint: str
+    introspection_endpoint: str
+    jwks_uri: str
+    response_types_supported: List[str]
+    grant_types_supported: List[str]
+    token_endpoint_auth_methods_supported: List[str]
+    subject_types_supported: List[str]
+    id_token_signing_alg_values_supported: List[str]
+
+
+class CachedDocument:
+    """JSON document rendered to bytes once and served with a strong ETag."""
+
+    def __init__(self, value: dict, max_age: int):
+        """Initialize the document."""
+        self.body = json.dumps(value, separators=(",", ":")).encode()
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.headers = {
+            "ETag": self.etag,
+            "Cache-Control": f"public, max-age={max_age}",
+        }
+
+    def not_modified(self, if_none_match: str) -> bool:
+        """Check an If-None-Match header against the ETag."""
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*" or tag.removeprefix("W/") == self.etag:
+                return True
+        return False
+
+    def response(self, request: Request) -> Response:
+        """Return the document, or 304 if the client's copy is current."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and self.not_modified(if_none_match):
+            return Response(status_code=304, headers=self.headers)
+        return Response(self.body, media_type="application/json", headers=self.headers)
+
+
+def openid_configuration(config: TenantConfig) -> CachedDocument:
+    """Render the openid-configuration document."""
+    return CachedDocument(
+        asdict(
+            OpenIDConfiguration(
+                issuer=config.oidc.issuer,
+                authorization_endpoint=f"{config.oidc.issuer}/oidc/authorize",
+                token_endpoint=f"{config.oidc.issuer}/oidc/token",
+                userinfo_endpoint=f"{config.oidc.issuer}/oidc/userinfo",
+                introspection_endpoint=f"{config.oidc.issuer}/oidc/introspect",
+                jwks_uri=f"{config.oidc.issuer}/.well-known/jwks.json",
+                response_types_supported=["code"],
+                grant_types_supported=[
+                    "authorization_code",
+                    "client_credentials",
+                    "refresh_token",
+                ],
+                token_endpoint_auth_methods_supported=[
+                    "client_secret_basic",
+                    "client_secret_post",
+                ],
+                subject_types_supported=["public"],
+                id_token_signing_alg_values_supported=config.signing_algs,
+            )
+        ),
+        config.oidc.cache_max_age,
+    )
+
+
+def jwks(keys: Iterable[Key], config: TenantConfig) -> CachedDocument:
+    """Render the JWKS document."""
+    jwks = []
+    for key in keys:
+        jwk = json.loads(key.get_jwk_public())
+        jwk["kid"] = key.get_jwk_thumbprint()
+        jwks.append(jwk)
+    return CachedDocument({"keys": jwks}, config.oidc.cache_max_age)
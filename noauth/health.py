@@ -0,0 +1,61 @@
+"""Event loop health.
+
+A background task sleeps for a fixed interval and records how late it wakes.
+The overshoot is the time other work held the event loop, which is how long any
+request would have waited to start.
+"""
+
+import asyncio
+from collections import deque
+from contextlib import suppress
+from time import perf_counter
+from typing import Deque, Optional
+
+
+class LagSampler:
+    """Sample event loop lag in the background.
+
+    The most recent window samples are kept. While a sample is overdue, the
+    time it has been overdue is reported as the current lag, so a loop that is
+    still blocked is not reported healthy on the strength of an old sample.
+    """
+
+    def __init__(self, interval: float = 0.5, window: int = 10):
+        """Initialize the sampler."""
+        self.interval = interval
+        self.samples: Deque[float] = deque(maxlen=window)
+        self._last = perf_counter()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> "LagSampler":
+        """Start sampling on the running loop."""
+        self._last = perf_counter()
+        self._task = asyncio.create_task(self._sample_loop())
+        return self
+
+    async def _sample_loop(self):
+        """Sleep for interval and record the overshoot."""
+        while True:
+            await asyncio.sleep(self.interval)
+            now = perf_counter()
+            self.samples.append(max(0.0, now - self._last - self.interval))
+            self._last = now
+
+    @property
+    def lag(self) -> float:
+        """Return the current lag in seconds."""
+        overdue = perf_counter() - self._last - self.interval
+        last = self.samples[-1] if self.samples else 0.0
+        return max(last, overdue, 0.0)
+
+    @property
+    def max_lag(self) -> float:
+        """Return the largest lag over the sample window in seconds."""
+        return max(self.lag, *self.samples) if self.samples else self.lag
+
+    async def stop(self):
+        """Stop sampling."""
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
@@ -1,31 +1,88 @@
-"""JWT utilities."""
+"""JWT utilities.
 
-import base64
-import json
-from typing import Union
+Tokens are built and parsed as bytes: the payload is serialized straight to
+bytes by the JSON codec, base64url encoded, and joined with the header segment
+without round trips through str.
+"""
+
+import binascii
+from typing import Any, Tuple, Union
 from aries_askar import Key
 
+from noauth import codec
+
+
+_TO_URLSAFE = bytes.maketrans(b"+/", b"-_")
+_FROM_URLSAFE = bytes.maketrans(b"-_", b"+/")
+
+
+def b64encode(value: bytes) -> bytes:
+    """b64urlsafe encoding without padding, bytes to bytes."""
+    return binascii.b2a_base64(value, newline=False).translate(_TO_URLSAFE).rstrip(b"=")
+
+
+def b64decode(value: bytes) -> bytes:
+    """b64urlsafe decoding without padding, bytes to bytes."""
+    # Excess padding is ignored, so always appending two is cheaper than counting
+    return binascii.a2b_base64(value.translate(_FROM_URLSAFE) + b"==")
+
 
 def base64_urlencode_no_padding(value: Union[str, bytes]) -> str:
     """b64urlsafe encoding without padding."""
     value = value.encode() if isinstance(value, str) else value
-    return base64.urlsafe_b64encode(value).strip(b"=").decode()
+    return b64encode(value).decode()
 
 
 def base64_urldecode_no_padding(value: str) -> str:
     """b64urlsafe decoding without padding."""
-    # Ensure correct padding
-    padding_needed = 4 - (len(value) % 4)
-    if padding_needed != 4:
-        value += "=" * padding_needed
+    return b64decode(value.encode()).decode()
 
-    return base64.urlsafe_b64decode(value).decode()
+
+def decode(token: Union[str, bytes]) -> Tuple[Any, Any, bytes]:
+    """Split a JWT into its decoded header, payload and signature.
+
+    The signature is not verified.
+    """
+    data = token.encode() if isinstance(token, str) else token
+    enc_headers, enc_payload, sig = data.split(b".")
+    return (
+        codec.loads(b64decode(enc_headers)),
+        codec.loads(b64decode(enc_payload)),
+        b64decode(sig),
+    )
 
 
 def sign(headers: dict, payload: dict, key: Key) -> str:
     """Sign and format a JWT."""
-    enc_headers = base64_urlencode_no_padding(json.dumps(headers, separators=(",", ":")))
-    enc_payload = base64_urlencode_no_padding(json.dumps(payload, separators=(",", ":")))
-    sig_payload = f"{enc_headers}.{enc_payload}"
-    sig = base64_urlencode_no_padding(key.sign_message(sig_payload))
-    return f"{enc_headers}.{enc_payload}.{sig}"
+    signing_input = b".".join(
+        (b64encode(codec.dumps(headers)), b64encode(codec.dumps(payload)))
+    )
+    sig = b64encode(key.sign_message(signing_input))
+    return b".".join((signing_input, sig)).decode()
+
+
+class Signer:
+    """Sign JWTs with a fixed key.
+
+    The kid and encoded header segment never change for a given key and alg so
+    they are computed once up front; only the payload is serialized per token.
+    """
+
+    def __init__(self, key: Key, alg: str):
+        """Initialize the signer."""
+        self.key = key
+        self.alg = alg
+        self.kid = key.get_jwk_thumbprint()
+        self.headers = {"alg": alg, "kid": self.kid}
+        self._prefix = b64encode(codec.dumps(self.headers)) + b"."
+        self.enc_headers = self._prefix[:-1].decode()
+
+    def signing_input(self, payload: dict) -> bytes:
+        """Return the header and payload segments that are signed."""
+        return self._prefix + b64encode(codec.dumps(payload))
+
+    def sign(self, payload: dict) -> str:
+        """Sign and format a JWT with the precomputed header."""
+        signing_input = self.signing_input(payload)
+        sig = b64encode(self.key.sign_message(signing_input))
+        return b".".join((signing_input, sig)).decode()
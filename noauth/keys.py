@@ -0,0 +1,66 @@
+"""Signing key management."""
+
+import logging
+import os
+from pathlib import Path
+import tempfile
+from typing import Union
+
+from aries_askar import Key, KeyAlg
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def key_alg_for(alg: str) -> KeyAlg:
+    """Return the key algorithm for a JWS alg."""
+    if alg == "ES256":
+        return KeyAlg.P256
+    return KeyAlg.ED25519
+
+
+def load_key(path: Path, key_alg: KeyAlg) -> Key:
+    """Load a key from a JWK file."""
+    key = Key.from_jwk(path.read_bytes())
+    if key.algorithm != key_alg:
+        raise ValueError(
+            f"Key in {path} is {key.algorithm.value}, expected {key_alg.value}"
+        )
+    return key
+
+
+def load_or_generate_key(path: Union[str, Path, None], alg: str) -> Key:
+    """Load the signing key from path, generating and persisting it if missing.
+
+    Without a path, a fresh key is generated on every call.
+
+    Several workers may start at once. The key is written to a temporary file
+    and hard linked into place, which fails if another process got there first;
+    the loser discards its key and loads the winner's. Readers therefore never
+    see a partially written file.
+    """
+    key_alg = key_alg_for(alg)
+    if not path:
+        return Key.generate(key_alg)
+
+    path = Path(path)
+    if path.exists():
+        LOGGER.debug("Loading key from %s", path)
+        return load_key(path, key_alg)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    key = Key.generate(key_alg)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(key.get_jwk_secret())
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            LOGGER.debug("Key created concurrently, loading from %s", path)
+            return load_key(path, key_alg)
+    finally:
+        os.unlink(tmp)
+
+    LOGGER.debug("Generated key and saved to %s", path)
+    return key
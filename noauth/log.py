@@ -0,0 +1,99 @@
+"""Logging setup.
+
+Records are handed to a queue on the calling thread and written to stdout by a
+listener thread, so request handlers never block on stdout.
+"""
+
+import atexit
+from datetime import datetime, timezone
+import json
+import logging
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from os import getenv
+from queue import SimpleQueue
+from typing import Literal, Optional
+
+
+LogFormat = Literal["text", "json"]
+
+DEFAULT_LEVEL = "WARNING"
+LOGGERS = ("noauth", "uvicorn")
+# uvicorn's logging config gives these their own stdout handlers; they are
+# routed through their parent's queue handler instead
+CHILD_LOGGERS = ("uvicorn.error", "uvicorn.access")
+
+_listener: Optional[QueueListener] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format record."""
+        value = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            value["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(value)
+
+
+def formatter(fmt: LogFormat) -> logging.Formatter:
+    """Return the formatter for a format name."""
+    if fmt == "json":
+        return JSONFormatter()
+    return logging.Formatter("[%(asctime)s] %(levelname)s %(name)s: %(message)s")
+
+
+class _QueueHandler(QueueHandler):
+    """Queue handler that leaves formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge args into the message while they are still current."""
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure(level: Optional[str] = None, fmt: Optional[LogFormat] = None):
+    """Configure noauth and uvicorn loggers.
+
+    NOAUTH_LOG_LEVEL and NOAUTH_LOG_FORMAT take precedence over the arguments;
+    without either, the level defaults to WARNING and the format to text.
+    """
+    global _listener
+
+    level = (getenv("NOAUTH_LOG_LEVEL") or level or DEFAULT_LEVEL).upper()
+    fmt = getenv("NOAUTH_LOG_FORMAT") or fmt or "text"  # type: ignore[assignment]
+
+    if _listener is not None:
+        _listener.stop()
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(formatter(fmt))
+    queue = SimpleQueue()
+    _listener = QueueListener(queue, stream)
+    _listener.start()
+
+    handler = _QueueHandler(queue)
+    for name in LOGGERS:
+        logger = logging.getLogger(name)
+        logger.handlers = [handler]
+        logger.setLevel(level)
+        logger.propagate = True
+    for name in CHILD_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.handlers = []
+        logger.setLevel(level)
+        logger.propagate = True
+
+
+@atexit.register
+def _stop():
+    """Flush queued records on exit."""
+    if _listener is not None:
+        _listener.stop()
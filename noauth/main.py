@@ -1,51 +1,37 @@
-"""NoAuth."""
+"""NoAuth.
 
-import logging
-import logging.config
+With NOAUTH_FAST_START set, the manual token pages are imported on first use.
+"""
+
+from noauth import startup
+
+from importlib import import_module
+from os import getenv
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
 from noauth.dependencies import setup
 
+from noauth import log
 from noauth import oidc
-from noauth import manual
-
-
-LOG_LEVEL = logging.DEBUG
-logging.config.dictConfig(
-    {
-        "version": 1,
-        "disable_existing_loggers": True,
-        "formatters": {
-            "standard": {
-                "format": "[%(asctime)s] %(levelname)s %(name)s: %(message)s",
-            },
-        },
-        "handlers": {
-            "default": {
-                "class": "logging.StreamHandler",
-                "formatter": "standard",
-                "stream": "ext://sys.stdout",
-            },
-        },
-        "loggers": {
-            "noauth": {
-                "handlers": ["default"],
-                "level": LOG_LEVEL,
-                "propagate": True,
-            },
-            "uvicorn": {
-                "handlers": ["default"],
-                "level": LOG_LEVEL,
-                "propagate": True,
-            },
-        },
-    }
-)
+from noauth import monitoring
+from noauth import debug
+from noauth.routing import LazyRoutes
+
+
+log.configure()
 
 app = FastAPI(lifespan=setup)
 
 app.include_router(oidc.router)
-app.include_router(manual.router)
+app.include_router(oidc.router, prefix="/t/{tenant}", include_in_schema=False)
+if getenv("NOAUTH_FAST_START"):
+    app.router.routes.append(LazyRoutes("/manual", "noauth.manual"))
+else:
+    app.include_router(import_module("noauth.manual").router)
+app.include_router(monitoring.router)
+app.include_router(debug.router)
 app.mount("/", StaticFiles(directory="static"), name="static")
+
+startup.mark("imports")
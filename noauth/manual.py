@@ -1,23 +1,43 @@
 """Retrieving a token."""
 
+import asyncio
 import json
 import logging
 from time import time
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 from uuid import uuid4
 
-from aries_askar import Key
 from fastapi import APIRouter, Depends, Form, HTTPException, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from pydantic import BaseModel
 
-from noauth import jwt
+from noauth import codec, jwt
+from noauth.codec import CodecJSONResponse
 from noauth.config import NoAuthConfig
+from noauth.jwt import Signer
+from noauth.metrics import TimedRoute
+from noauth.signing import SigningExecutor
+from noauth.token_cache import TokenCache
 from noauth.oidc import url_with_query
-from noauth.templates import templates
-from noauth.dependencies import config, default_token, key
+from noauth.templates import get_templates
+from noauth.dependencies import config, default_token, signer, signing, token_cache
 
-router = APIRouter(prefix="/manual")
+router = APIRouter(prefix="/manual", route_class=TimedRoute)
 LOGGER = logging.getLogger("uvicorn.error." + __name__)
+# Tokens signed concurrently per chunk of a streamed batch
+STREAM_CHUNK_SIZE = 256
+
+
+def token_payload(claims: dict, valid_for: int, issuer: str) -> dict:
+    """Build a token payload from claims."""
+    now = int(time())
+    return {
+        "exp": now + valid_for,
+        "iat": now,
+        "jti": str(uuid4()),
+        "iss": issuer,
+        **claims,
+    }
 
 
 @router.get("/token", response_class=HTMLResponse)
@@ -28,51 +48,101 @@ async def manual_token(
     """Generate a token."""
     query = request.query_params
     claims = dict(query)
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         request=request,
         name="token_entry.html",
         context={"default": {**default_token, **claims}},
     )
 
 
-@router.get("/api/token")
+@router.get("/api/token", response_class=CodecJSONResponse)
 async def api_token(
     request: Request,
     valid_for: Optional[int] = None,
+    reuse: Optional[bool] = None,
     default_token: dict = Depends(default_token),
-    key: Key = Depends(key),
+    signer: Signer = Depends(signer),
+    signing: SigningExecutor = Depends(signing),
     config: NoAuthConfig = Depends(config),
+    token_cache: TokenCache = Depends(token_cache),
 ):
-    """Generate a token for headless access."""
+    """Generate a token for headless access.
+
+    With reuse (or token_cache.enabled), a token signed earlier for the same
+    claims is returned while enough of its lifetime remains.
+    """
     query = request.query_params
     additional_claims = dict(query)
+    additional_claims.pop("reuse", None)
     claims = {**default_token, **additional_claims}
 
     valid_for = valid_for or 300
-    now = int(time())
+    if reuse is None:
+        reuse = config.token_cache.enabled
+    if not reuse:
+        token = await signing.sign(
+            signer, token_payload(claims, valid_for, config.oidc.issuer)
+        )
+        return CodecJSONResponse({"token": token})
 
-    token = jwt.sign(
-        headers={
-            "alg": config.client.id_token_signed_response_alg,
-            "kid": key.get_jwk_thumbprint(),
-        },
-        payload={
-            "exp": now + valid_for,
-            "iat": now,
-            "jti": str(uuid4()),
-            "iss": config.oidc.issuer,
-            **claims,
-        },
-        key=key,
-    )
-    return {"token": token}
+    key = token_cache.key(claims, valid_for, config.oidc.issuer, signer.kid)
+    token = token_cache.get(key, time())
+    if token is None:
+        payload = token_payload(claims, valid_for, config.oidc.issuer)
+        token = await signing.sign(signer, payload)
+        token_cache.put(key, token, payload["iat"], payload["exp"])
+    return CodecJSONResponse({"token": token})
+
+
+class TokenBatch(BaseModel):
+    """Batch of claim sets to sign."""
+
+    claims: List[Dict[str, Any]]
+    valid_for: Optional[int] = None
+
+
+@router.post("/api/tokens")
+async def api_tokens(
+    batch: TokenBatch,
+    default_token: dict = Depends(default_token),
+    signer: Signer = Depends(signer),
+    signing: SigningExecutor = Depends(signing),
+    config: NoAuthConfig = Depends(config),
+):
+    """Generate a batch of tokens for headless access.
+
+    Tokens are streamed as newline delimited JSON, one {"token": ...} object per
+    claim set and in the same order as the request. Only the response is
+    streamed: the request body is parsed in full before signing starts, so very
+    large batches should be split across requests.
+    """
+    valid_for = batch.valid_for or 300
+
+    async def tokens() -> AsyncIterator[bytes]:
+        for start in range(0, len(batch.claims), STREAM_CHUNK_SIZE):
+            chunk = batch.claims[start : start + STREAM_CHUNK_SIZE]
+            signed = await asyncio.gather(
+                *(
+                    signing.sign(
+                        signer,
+                        token_payload(
+                            {**default_token, **claims}, valid_for, config.oidc.issuer
+                        ),
+                    )
+                    for claims in chunk
+                )
+            )
+            yield b"".join(codec.dumps({"token": token}) + b"\n" for token in signed)
+
+    return StreamingResponse(tokens(), media_type="application/x-ndjson")
 
 
 @router.post("/token")
 async def post_manual_token_and_redirect(
     claims: str = Form(),
     valid_for: str = Form(),
-    key: Key = Depends(key),
+    signer: Signer = Depends(signer),
+    signing: SigningExecutor = Depends(signing),
     config: NoAuthConfig = Depends(config),
 ):
     """Submit token form and get signed token."""
@@ -82,22 +152,8 @@ async def post_manual_token_and_redirect(
         raise HTTPException(400, "Invalid claims")
 
     valid = int(valid_for)
-
-    now = int(time())
-
-    token = jwt.sign(
-        headers={
-            "alg": config.client.id_token_signed_response_alg,
-            "kid": key.get_jwk_thumbprint(),
-        },
-        payload={
-            "exp": now + valid,
-            "iat": now,
-            "jti": str(uuid4()),
-            "iss": config.oidc.issuer,
-            **parsed_claims,
-        },
-        key=key,
+    token = await signing.sign(
+        signer, token_payload(parsed_claims, valid, config.oidc.issuer)
     )
     return RedirectResponse(
         url_with_query("/manual/token/complete", token=token, **parsed_claims),
@@ -115,13 +171,12 @@ async def manual_token_complete(
     claims = dict(query)
     del claims["token"]
 
-    enc_headers, enc_payload, sig = token.split(".")
-    headers = json.loads(jwt.base64_urldecode_no_padding(enc_headers))
-    payload = json.loads(jwt.base64_urldecode_no_padding(enc_payload))
+    headers, payload, _ = jwt.decode(token)
+    sig = token.rpartition(".")[2]
     token_value = "\n.\n".join(
         [json.dumps(headers, indent=2), json.dumps(payload, indent=2), sig]
     )
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         request=request,
         name="token_complete.html",
         context={
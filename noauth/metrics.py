@@ -0,0 +1,127 @@
+"""Prometheus metrics.
+
+Metrics are plain counters updated from the event loop thread, so recording
+a sample is a bisect and two additions; no locks are taken.
+"""
+
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Callable, Coroutine, Dict, Iterator, List, Optional, Sequence
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from noauth import startup
+
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+
+class Histogram:
+    """Histogram with fixed buckets."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Initialize the histogram."""
+        self.buckets = tuple(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Record a value."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, name: str, labels: str = "") -> Iterator[str]:
+        """Render the histogram samples in Prometheus text format."""
+        sep = "," if labels else ""
+        suffix = f"{{{labels}}}" if labels else ""
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield f'{name}_bucket{{{labels}{sep}le="{bound}"}} {total}'
+        total += self.counts[-1]
+        yield f'{name}_bucket{{{labels}{sep}le="+Inf"}} {total}'
+        yield f"{name}_sum{suffix} {self.sum}"
+        yield f"{name}_count{suffix} {total}"
+
+
+STORE_COUNTERS = ("evictions", "expirations", "compactions", "rejections", "sweep_errors")
+
+REQUEST_SECONDS: Dict[str, Histogram] = {}
+SIGN_SECONDS = Histogram()
+
+
+def request_histogram(route: str) -> Histogram:
+    """Return the request latency histogram for a route."""
+    if route not in REQUEST_SECONDS:
+        REQUEST_SECONDS[route] = Histogram()
+    return REQUEST_SECONDS[route]
+
+
+class TimedRoute(APIRoute):
+    """Route that records its request latency."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        """Wrap the route handler with a timer."""
+        handler = super().get_route_handler()
+        histogram = request_histogram(self.path)
+
+        async def timed_handler(request: Request) -> Response:
+            start = perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                histogram.observe(perf_counter() - start)
+
+        return timed_handler
+
+
+def render(
+    store_stats: Dict[str, int], token_cache_stats: Optional[Dict[str, int]] = None
+) -> str:
+    """Render all metrics in Prometheus text format."""
+    lines = [
+        "# HELP noauth_request_duration_seconds Request latency by route.",
+        "# TYPE noauth_request_duration_seconds histogram",
+    ]
+    for route, histogram in REQUEST_SECONDS.items():
+        lines.extend(
+            histogram.render("noauth_request_duration_seconds", f'route="{route}"')
+        )
+
+    lines.append("# HELP noauth_jwt_sign_duration_seconds JWT signing time.")
+    lines.append("# TYPE noauth_jwt_sign_duration_seconds histogram")
+    lines.extend(SIGN_SECONDS.render("noauth_jwt_sign_duration_seconds"))
+
+    for name, value in store_stats.items():
+        kind = "counter" if name in STORE_COUNTERS else "gauge"
+        metric = f"noauth_store_{name}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.append(f"{metric} {value}")
+
+    lines.append("# HELP noauth_startup_seconds Time spent in each startup phase.")
+    lines.append("# TYPE noauth_startup_seconds gauge")
+    for phase, seconds in startup.PHASES.items():
+        lines.append(f'noauth_startup_seconds{{phase="{phase}"}} {seconds}')
+
+    for name, value in (token_cache_stats or {}).items():
+        kind = "counter" if name in ("hits", "misses") else "gauge"
+        metric = f"noauth_token_cache_{name}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.append(f"{metric} {value}")
+
+    lines.append("")
+    return "\n".join(lines)
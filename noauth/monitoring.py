@@ -0,0 +1,64 @@
+"""Monitoring endpoints."""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import JSONResponse
+
+from noauth import metrics as _metrics
+from noauth.config import NoAuthConfig
+from noauth.dependencies import config, lag_sampler, store, token_cache
+from noauth.health import LagSampler
+from noauth.store import Store
+from noauth.token_cache import TokenCache
+
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def metrics(
+    store: Store = Depends(store), token_cache: TokenCache = Depends(token_cache)
+):
+    """Return metrics in Prometheus text format."""
+    return Response(
+        _metrics.render(store.stats(), token_cache.stats()),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+def health(store: Store, sampler: LagSampler) -> dict:
+    """Return the health report shared by /healthz and /readyz."""
+    return {
+        "loop_lag": sampler.lag,
+        "loop_lag_max": sampler.max_lag,
+        "expiry_task": not store.expiry_task.done(),
+        "store_entries": store.stats()["entries"],
+    }
+
+
+@router.get("/healthz")
+async def healthz(
+    store: Store = Depends(store), sampler: LagSampler = Depends(lag_sampler)
+):
+    """Liveness: fails only if the store can no longer expire entries."""
+    report = health(store, sampler)
+    ok = report["expiry_task"]
+    report["status"] = "ok" if ok else "unavailable"
+    return JSONResponse(report, status_code=200 if ok else 503)
+
+
+@router.get("/readyz")
+async def readyz(
+    max_lag: Optional[float] = Query(None),
+    store: Store = Depends(store),
+    sampler: LagSampler = Depends(lag_sampler),
+    config: NoAuthConfig = Depends(config),
+):
+    """Readiness: also fails while event loop lag exceeds max_lag seconds."""
+    if max_lag is None:
+        max_lag = config.health.max_lag
+    report = health(store, sampler)
+    ok = report["expiry_task"] and report["loop_lag"] <= max_lag
+    report["status"] = "ok" if ok else "unavailable"
+    return JSONResponse(report, status_code=200 if ok else 503)
@@ -1,30 +1,46 @@
 """OpenID Connect."""
 
-from copy import deepcopy
-from dataclasses import asdict, dataclass
+import base64
+import binascii
+from dataclasses import dataclass
 import json
 import logging
+from hmac import compare_digest
 from secrets import token_urlsafe
 from time import time
-from typing import List, Mapping, Optional, Union
-from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+from typing import Dict, Mapping, Optional, Union
+from urllib.parse import parse_qsl, unquote, urlencode, urlparse, urlunparse
 from uuid import uuid4
 
-from aries_askar import Key
 from fastapi import APIRouter, Depends, Form, HTTPException, Query, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from starlette.datastructures import UploadFile
 
-from noauth.config import NoAuthConfig
-from noauth.dependencies import config, default_user, key, store
-from noauth.store import TemporalKVStore
-from noauth.templates import templates
-from noauth import jwt
-
-
-router = APIRouter()
+from noauth.codec import CodecJSONResponse
+from noauth.config import ClientConfig, TenantConfig
+from noauth.claims import ScopeClaims
+from noauth.dependencies import (
+    client_scope_claims,
+    config,
+    default_token,
+    discovery,
+    jwks,
+    signers,
+    signing,
+    store,
+)
+from noauth.documents import CachedDocument
+from noauth.jwt import Signer
+from noauth.metrics import TimedRoute
+from noauth.signing import SigningExecutor
+from noauth.store import Store
+from noauth.templates import get_templates
+
+
+router = APIRouter(route_class=TimedRoute)
 LOGGER = logging.getLogger(__name__)
 TTL = 30
+ACCESS_TOKEN_TTL = 300
 
 
 def url_with_query(url: str, **params: str) -> str:
@@ -38,9 +54,12 @@ def url_with_query(url: str, **params: str) -> str:
     )
 
 
-@dataclass
+@dataclass(slots=True)
 class OIDCRecord:
-    """Record for an in progress OIDC flow."""
+    """Record for an in progress OIDC flow.
+
+    Records are serialized positionally to keep stored flow state small.
+    """
 
     id: str
     client_id: str
@@ -49,15 +68,25 @@ class OIDCRecord:
     state: str
     claims: Optional[dict] = None
     code: Optional[str] = None
+    auth_time: Optional[int] = None
 
-    def serialize(self) -> dict:
+    def serialize(self) -> list:
         """Serialize record."""
-        return asdict(self)
+        return [
+            self.id,
+            self.client_id,
+            self.redirect_uri,
+            self.scope,
+            self.state,
+            self.claims,
+            self.code,
+            self.auth_time,
+        ]
 
     @classmethod
-    def deserialize(cls, value: dict) -> "OIDCRecord":
-        """Deserialize record from dictionary."""
-        return cls(**value)
+    def deserialize(cls, value: list) -> "OIDCRecord":
+        """Deserialize record from a list."""
+        return cls(*value)
 
 
 def oidc_error(redirect_uri: str, msg: str) -> RedirectResponse:
@@ -66,45 +95,59 @@ def oidc_error(redirect_uri: str, msg: str) -> RedirectResponse:
     return RedirectResponse(url)
 
 
-@dataclass
-class OpenIDConfiguration:
-    """OpenID Config."""
-
-    issuer: str
-    authorization_endpoint: str
-    token_endpoint: str
-    jwks_uri: str
-    response_types_supported: List[str]
-    subject_types_supported: List[str]
-    id_token_signing_alg_values_supported: List[str]
-
-
 @router.get("/.well-known/openid-configuration")
 async def configuration(
-    config: NoAuthConfig = Depends(config),
+    request: Request,
+    discovery: CachedDocument = Depends(discovery),
 ):
     """Return openid-configuration."""
-    return OpenIDConfiguration(
-        issuer=config.oidc.issuer,
-        authorization_endpoint=f"{config.oidc.issuer}/oidc/authorize",
-        token_endpoint=f"{config.oidc.issuer}/oidc/token",
-        jwks_uri=f"{config.oidc.issuer}/.well-known/jwks.json",
-        response_types_supported=["code"],
-        subject_types_supported=["public"],
-        id_token_signing_alg_values_supported=[
-            config.client.id_token_signed_response_alg
-        ],
-    )
+    return discovery.response(request)
 
 
 @router.get("/.well-known/jwks.json")
 async def keys(
-    key: Key = Depends(key),
+    request: Request,
+    jwks: CachedDocument = Depends(jwks),
 ):
     """Return keys."""
-    jwk = json.loads(key.get_jwk_public())
-    jwk["kid"] = key.get_jwk_thumbprint()
-    return {"keys": [jwk]}
+    return jwks.response(request)
+
+
+def json_object(value: str) -> Optional[dict]:
+    """Parse value as a JSON object, returning None if it is not one."""
+    try:
+        parsed = json.loads(value)
+    except json.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def hinted_claims(login_hint: Optional[str], claims: Optional[str]) -> dict:
+    """Parse claims supplied to a headless authorize request.
+
+    claims is a JSON object of claim values. login_hint may also be a JSON object;
+    any other login_hint is used as the sub.
+    """
+    hinted = {}
+    if login_hint:
+        hinted.update(json_object(login_hint) or {"sub": login_hint})
+    if claims:
+        parsed = json_object(claims)
+        if parsed is None:
+            raise HTTPException(400, "Invalid claims")
+        hinted.update(parsed)
+    return hinted
+
+
+async def issue_code(store: Store, oidc: OIDCRecord) -> RedirectResponse:
+    """Store the completed record under its code and redirect to the client."""
+    assert oidc.code
+    oidc.auth_time = int(time())
+    await store.set(f"oidc:code:{oidc.code}", value=oidc.serialize(), ttl=30.0)
+    return RedirectResponse(
+        url_with_query(oidc.redirect_uri, state=oidc.state, code=oidc.code),
+        status_code=303,
+    )
 
 
 @router.get("/oidc/authorize", response_class=HTMLResponse)
@@ -115,11 +158,26 @@ async def authorize(
     redirect_uri: str = Query(),
     scope: str = Query(),
     state: str = Query(),
-    store: TemporalKVStore = Depends(store),
-    default_user: dict = Depends(default_user),
-    config: NoAuthConfig = Depends(config),
+    prompt: Optional[str] = Query(None),
+    login_hint: Optional[str] = Query(None),
+    claims: Optional[str] = Query(None),
+    store: Store = Depends(store),
+    client_scope_claims: Dict[str, ScopeClaims] = Depends(client_scope_claims),
+    config: TenantConfig = Depends(config),
 ):
-    """OIDC Authorize endpoint."""
+    """OIDC Authorize endpoint.
+
+    With prompt=none, or for a client configured as headless, the claims form is
+    skipped and the client is redirected straight back with a code.
+    """
+    # Errors about the client or redirect_uri must not redirect to it
+    client = config.clients.get(client_id)
+    if client is None:
+        raise HTTPException(400, "Unknown client_id")
+
+    if not client.allows_redirect_uri(redirect_uri):
+        raise HTTPException(400, "redirect_uri not allowed for client")
+
     if response_type != "code":
         return oidc_error(redirect_uri, "Bad response_type")
 
@@ -138,18 +196,22 @@ async def authorize(
         state=state,
         code=code,
     )
-    await store.set(key=f"oidc:{oidc.id}", value=oidc, ttl=30.0)
-    claims = deepcopy(default_user)
-    for scp in scope.split(" "):
-        if scp == "openid":
-            continue
-        if config.scopes and scp in config.scopes:
-            claims.update(config.scopes[scp])
-
-    return templates.TemplateResponse(
+    resolved_claims = client_scope_claims[client_id](scope)
+
+    if client.headless or prompt == "none":
+        oidc.claims = {**resolved_claims, **hinted_claims(login_hint, claims)}
+        return await issue_code(store, oidc)
+
+    await store.set(key=f"oidc:{oidc.id}", value=oidc.serialize(), ttl=30.0)
+    return get_templates().TemplateResponse(
         request=request,
         name="id_entry.html",
-        context={"id": oidc.id, "claims": claims},
+        context={
+            "claims": resolved_claims,
+            "submit_url": request.url_for(
+                "submit_and_redirect", **request.path_params, id=oidc.id
+            ),
+        },
     )
 
 
@@ -157,7 +219,7 @@ async def authorize(
 async def submit_and_redirect(
     id: str,
     claims: str = Form(),
-    store: TemporalKVStore = Depends(store),
+    store: Store = Depends(store),
 ):
     """Redirect back to the client."""
     try:
@@ -165,20 +227,32 @@ async def submit_and_redirect(
     except json.JSONDecodeError:
         raise HTTPException(400, "Invalid claims")
 
-    oidc = await store.get("oidc:" + id)
+    # Move the record from its id to its code
+    value = await store.pop("oidc:" + id)
 
-    if oidc is None:
+    if value is None:
         raise HTTPException(403, "Unknown exchange")
-    assert isinstance(oidc, OIDCRecord)
+    oidc = OIDCRecord.deserialize(value)
 
-    assert oidc.code
     oidc.claims = parsed_claims
-    await store.set(f"oidc:code:{oidc.code}", value=oidc, ttl=30.0)
+    return await issue_code(store, oidc)
 
-    return RedirectResponse(
-        url_with_query(oidc.redirect_uri, state=oidc.state, code=oidc.code),
-        status_code=303,
-    )
+
+GRANT_TYPES = ("authorization_code", "client_credentials", "refresh_token")
+
+
+def form_str(
+    form: Mapping[str, Union[UploadFile, str]], name: str, required: bool = True
+) -> Optional[str]:
+    """Return a string field from a form."""
+    value = form.get(name)
+    if not value:
+        if required:
+            raise HTTPException(400, f"missing {name}")
+        return None
+    if not isinstance(value, str):
+        raise HTTPException(400, f"bad {name}")
+    return value
 
 
 @dataclass
@@ -186,102 +260,269 @@ class TokenForm:
     """Token form."""
 
     grant_type: str
-    client_id: str
-    client_secret: str
-    redirect_uri: str
-    code: str
+    client_id: Optional[str] = None
+    client_secret: Optional[str] = None
+    redirect_uri: Optional[str] = None
+    code: Optional[str] = None
+    refresh_token: Optional[str] = None
+    scope: Optional[str] = None
 
     @classmethod
-    def validate(cls, form: Mapping[str, Union[UploadFile, str]]) -> "TokenForm":  # noqa: C901
-        """Validate and return."""
-        # Basic Validation
-        grant_type = form.get("grant_type")
-        if not grant_type:
-            raise HTTPException(400, "missing grant_type")
-        if not isinstance(grant_type, str):
-            raise HTTPException(400, "bad grant_type")
-
-        client_id = form.get("client_id")
-        if not client_id:
-            raise HTTPException(400, "missing client_id")
-        if not isinstance(client_id, str):
-            raise HTTPException(400, "bad client_id")
-
-        client_secret = form.get("client_secret")
-        if not client_secret:
-            raise HTTPException(400, "missing client_secret")
-        if not isinstance(client_secret, str):
-            raise HTTPException(400, "bad client_secret")
-
-        redirect_uri = form.get("redirect_uri")
-        if not redirect_uri:
-            raise HTTPException(400, "missing redirect_uri")
-        if not isinstance(redirect_uri, str):
-            raise HTTPException(400, "bad redirect_uri")
-
-        code = form.get("code")
-        if not code:
-            raise HTTPException(400, "missing code")
-
-        if not isinstance(code, str):
-            raise HTTPException(400, "bad code")
-
-        return cls(grant_type, client_id, client_secret, redirect_uri, code)
-
-
-@router.post("/oidc/token")
+    def validate(cls, form: Mapping[str, Union[UploadFile, str]]) -> "TokenForm":
+        """Validate and return.
+
+        Which fields are required depends on the grant_type. Client credentials
+        are optional here since they may come by HTTP Basic instead.
+        """
+        grant_type = form_str(form, "grant_type")
+        if grant_type not in GRANT_TYPES:
+            raise HTTPException(400, "unsupported grant_type")
+
+        assert grant_type
+
+        authorization_code = grant_type == "authorization_code"
+        return cls(
+            grant_type,
+            client_id=form_str(form, "client_id", required=False),
+            client_secret=form_str(form, "client_secret", required=False),
+            redirect_uri=form_str(form, "redirect_uri", required=authorization_code),
+            code=form_str(form, "code", required=authorization_code),
+            refresh_token=form_str(
+                form, "refresh_token", required=grant_type == "refresh_token"
+            ),
+            scope=form_str(form, "scope", required=False),
+        )
+
+
+@router.post("/oidc/token", response_class=CodecJSONResponse)
 async def token(
     request: Request,
-    store: TemporalKVStore = Depends(store),
-    key: Key = Depends(key),
-    config: NoAuthConfig = Depends(config),
+    store: Store = Depends(store),
+    signers: Dict[str, Signer] = Depends(signers),
+    signing: SigningExecutor = Depends(signing),
+    default_token: dict = Depends(default_token),
+    config: TenantConfig = Depends(config),
 ):
-    """OIDC Token endpoint."""
-    form = TokenForm.validate(await request.form())
+    """OIDC Token endpoint.
 
-    # More Validation
-    # TODO Make sure redirect_uri matches
-    # TODO Make sure client_id and secret match
-    if form.grant_type != "authorization_code":
-        raise HTTPException(400, "only authorization_code grant_type supported")
-
-    oidc = await store.get(f"oidc:code:{form.code}")
-    if oidc is None:
-        raise HTTPException(404)
-    assert isinstance(oidc, OIDCRecord)
-
-    assert oidc.claims
+    Clients authenticate by HTTP Basic (client_secret_basic) or with form
+    credentials (client_secret_post).
+    """
+    form = TokenForm.validate(await request.form())
+    client = authenticate_client(request, config, form.client_id, form.client_secret)
+    assert client.client_id
+    client_id = client.client_id
+    signer = signers[client.id_token_signed_response_alg]
 
     now = int(time())
 
-    token = jwt.sign(
-        headers={
-            "alg": config.client.id_token_signed_response_alg,
-            "kid": key.get_jwk_thumbprint(),
-        },
-        payload={
-            "exp": now + 300,
+    if form.grant_type == "client_credentials":
+        # Machine to machine: a signed access token from the token defaults
+        scope = form.scope or default_token.get("scope", "")
+        claims = {**default_token, "sub": client_id, "scope": scope}
+        at = await signing.sign(
+            signer,
+            {
+                "exp": now + ACCESS_TOKEN_TTL,
+                "iat": now,
+                "jti": str(uuid4()),
+                "iss": config.oidc.issuer,
+                "client_id": client_id,
+                **claims,
+            },
+        )
+        await issue_access_token(
+            store, claims, client_id, scope, config.oidc.issuer, now, at=at
+        )
+        return CodecJSONResponse(
+            {
+                "token_type": "Bearer",
+                "expires_in": ACCESS_TOKEN_TTL,
+                "scope": scope,
+                "access_token": at,
+            }
+        )
+
+    if form.grant_type == "refresh_token":
+        # Refresh tokens are rotated on every use; only the client they were
+        # issued to may spend them
+        key = f"oidc:refresh:{form.refresh_token}"
+        value = await store.get(key)
+        if value is None or value["client_id"] != client_id:
+            raise HTTPException(400, "invalid refresh_token")
+        if await store.pop(key) is None:
+            raise HTTPException(400, "invalid refresh_token")
+        client_id, scope, claims = value["client_id"], value["scope"], value["claims"]
+        auth_time = value.get("auth_time", now)
+    else:
+        # Codes are single use; a replayed code is not found
+        value = await store.pop(f"oidc:code:{form.code}")
+        if value is None:
+            raise HTTPException(404)
+        oidc = OIDCRecord.deserialize(value)
+        if oidc.client_id != client_id or oidc.redirect_uri != form.redirect_uri:
+            raise HTTPException(
+                400, "code was not issued to this client and redirect_uri"
+            )
+        assert oidc.claims
+        client_id, scope = oidc.client_id, oidc.scope
+        claims = {"sub": oidc.id, **oidc.claims}
+        auth_time = oidc.auth_time or now
+
+    token = await signing.sign(
+        signer,
+        {
+            "exp": now + ACCESS_TOKEN_TTL,
             "iat": now,
-            "auth_time": now,
+            "auth_time": auth_time,
             "jti": str(uuid4()),
             "iss": config.oidc.issuer,
-            "aud": oidc.client_id,
+            "aud": client_id,
             "typ": "ID",
-            "azp": oidc.client_id,
-            "sub": oidc.id,
-            **oidc.claims,
+            "azp": client_id,
+            **claims,
         },
-        key=key,
     )
-    at = token_urlsafe()
-    await store.set(f"oidc:token:{at}", None, ttl=300.0)
-
+    at = await issue_access_token(
+        store, claims, client_id, scope, config.oidc.issuer, now
+    )
     response = {
         "token_type": "Bearer",
-        "expires_in": 300,
-        "scope": oidc.scope,
+        "expires_in": ACCESS_TOKEN_TTL,
+        "scope": scope,
         "id_token": token,
-        "access_token": token_urlsafe(),
+        "access_token": at,
     }
+    if config.oidc.refresh_tokens == "always" or (
+        config.oidc.refresh_tokens == "offline_access"
+        and "offline_access" in scope.split()
+    ):
+        rt = token_urlsafe()
+        await store.set(
+            f"oidc:refresh:{rt}",
+            {
+                "claims": claims,
+                "client_id": client_id,
+                "scope": scope,
+                "auth_time": auth_time,
+            },
+            ttl=config.oidc.refresh_token_ttl,
+        )
+        response["refresh_token"] = rt
     LOGGER.debug("response: %s", response)
-    return response
+    return CodecJSONResponse(response)
+
+
+async def issue_access_token(
+    store: Store,
+    claims: dict,
+    client_id: str,
+    scope: str,
+    issuer: str,
+    now: int,
+    at: Optional[str] = None,
+) -> str:
+    """Store an access token with the claims it grants.
+
+    Unless given a token value, a new opaque token is generated.
+    """
+    at = at or token_urlsafe()
+    await store.set(
+        f"oidc:token:{at}",
+        {
+            "claims": claims,
+            "client_id": client_id,
+            "scope": scope,
+            "iss": issuer,
+            "iat": now,
+            "exp": now + ACCESS_TOKEN_TTL,
+        },
+        ttl=ACCESS_TOKEN_TTL,
+    )
+    return at
+
+
+def bearer_token(request: Request) -> str:
+    """Return the bearer token from the Authorization header."""
+    scheme, _, value = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not value:
+        raise HTTPException(
+            401, "missing bearer token", headers={"WWW-Authenticate": "Bearer"}
+        )
+    return value.strip()
+
+
+@router.api_route(
+    "/oidc/userinfo", methods=["GET", "POST"], response_class=CodecJSONResponse
+)
+async def userinfo(
+    request: Request,
+    store: Store = Depends(store),
+):
+    """OIDC UserInfo endpoint."""
+    value = await store.get(f"oidc:token:{bearer_token(request)}")
+    if value is None:
+        raise HTTPException(
+            401,
+            "invalid token",
+            headers={"WWW-Authenticate": 'Bearer error="invalid_token"'},
+        )
+    return CodecJSONResponse(value["claims"])
+
+
+def authenticate_client(
+    request: Request,
+    config: TenantConfig,
+    client_id: Optional[str] = None,
+    client_secret: Optional[str] = None,
+) -> ClientConfig:
+    """Authenticate a client by HTTP Basic or by form credentials (RFC 6749 2.3.1)."""
+    scheme, _, value = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "basic":
+        try:
+            decoded = base64.b64decode(value.strip(), validate=True).decode()
+        except (binascii.Error, UnicodeDecodeError):
+            decoded = ""
+        basic_id, _, basic_secret = decoded.partition(":")
+        client_id, client_secret = unquote(basic_id), unquote(basic_secret)
+
+    client = config.clients.get(client_id or "")
+    if client is None or not compare_digest(
+        client.client_secret.encode(), (client_secret or "").encode()
+    ):
+        raise HTTPException(
+            401, "invalid client", headers={"WWW-Authenticate": 'Basic realm="noauth"'}
+        )
+    return client
+
+
+@router.post("/oidc/introspect", response_class=CodecJSONResponse)
+async def introspect(
+    request: Request,
+    token: str = Form(),
+    client_id: Optional[str] = Form(None),
+    client_secret: Optional[str] = Form(None),
+    store: Store = Depends(store),
+    config: TenantConfig = Depends(config),
+):
+    """OAuth 2.0 Token Introspection endpoint (RFC 7662).
+
+    Callers must authenticate as a configured client.
+    """
+    authenticate_client(request, config, client_id, client_secret)
+    value = await store.get(f"oidc:token:{token}")
+    if value is None:
+        return CodecJSONResponse({"active": False})
+    return CodecJSONResponse(
+        {
+            **value["claims"],
+            "active": True,
+            "token_type": "Bearer",
+            "scope": value["scope"],
+            "client_id": value["client_id"],
+            "aud": value["client_id"],
+            "iss": value["iss"],
+            "iat": value["iat"],
+            "exp": value["exp"],
+        }
+    )
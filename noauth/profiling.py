@@ -0,0 +1,95 @@
+"""Sampling profiler and memory snapshots for the debug endpoints.
+
+Nothing here runs unless a debug endpoint is called: the profiler samples only
+for the requested duration and tracemalloc is started on first request.
+"""
+
+from collections import Counter
+import os
+import sys
+import time
+import tracemalloc
+from types import FrameType
+from typing import Any, Dict, List
+
+from noauth import store as _store_module
+from noauth.store import Store, TemporalKVStore
+
+
+STORE_FILE = _store_module.__file__
+
+
+def frame_label(frame: FrameType) -> str:
+    """Return the label of a frame in a collapsed stack."""
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def collapse(frame: FrameType) -> str:
+    """Return the stack ending at frame, root first, joined by semicolons."""
+    labels = []
+    current: Any = frame
+    while current is not None:
+        labels.append(frame_label(current))
+        current = current.f_back
+    return ";".join(reversed(labels))
+
+
+def sample_stacks(thread_id: int, seconds: float, interval: float) -> Counter:
+    """Sample the stack of another thread for seconds, counting each stack.
+
+    Runs on its own thread; the sampled thread only pays for the GIL hand-off
+    at each sample.
+    """
+    stacks: Counter = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            break
+        stacks[collapse(frame)] += 1
+        del frame
+        time.sleep(interval)
+    return stacks
+
+
+def render_collapsed(stacks: Counter) -> str:
+    """Render stacks in the collapsed format read by flamegraph tools."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def _top(snapshot: tracemalloc.Snapshot, limit: int) -> List[Dict[str, Any]]:
+    """Return the top allocating lines of a snapshot."""
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size": stat.size,
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+def memory_report(store: Store, limit: int = 20) -> Dict[str, Any]:
+    """Report traced memory, split into the store and everything else.
+
+    Store contents are sized by the store's own accounting, since their values
+    are allocated by the request handlers that store them. Allocations made
+    with the store module on the stack are listed under store; the rest under
+    other.
+    """
+    snapshot = tracemalloc.take_snapshot()
+    in_store = tracemalloc.Filter(True, STORE_FILE, all_frames=True)
+    not_in_store = tracemalloc.Filter(False, STORE_FILE, all_frames=True)
+    current, peak = tracemalloc.get_traced_memory()
+
+    report: Dict[str, Any] = {
+        "traced": current,
+        "peak": peak,
+        "store": {"allocators": _top(snapshot.filter_traces([in_store]), limit)},
+        "other": {"allocators": _top(snapshot.filter_traces([not_in_store]), limit)},
+    }
+    if isinstance(store, TemporalKVStore):
+        report["store"]["entries"] = len(store.store)
+        report["store"]["approximate_bytes"] = store.bytes
+    return report
@@ -0,0 +1,47 @@
+"""Routes loaded on first use."""
+
+from importlib import import_module
+from typing import Any, Optional, Tuple
+
+from fastapi import APIRouter
+from starlette.routing import BaseRoute, Match, NoMatchFound
+from starlette.types import Receive, Scope, Send
+
+
+class LazyRoutes(BaseRoute):
+    """Every route under a path prefix, from a module imported on first request.
+
+    The module must define router with its routes under prefix. Until the first
+    request, its routes are absent from url_for and the OpenAPI schema.
+    """
+
+    def __init__(self, prefix: str, module: str):
+        """Initialize the routes."""
+        self.prefix = prefix
+        self.module = module
+        self._router: Optional[APIRouter] = None
+
+    @property
+    def router(self) -> APIRouter:
+        """Import the module on first access and return its router."""
+        if self._router is None:
+            self._router = import_module(self.module).router
+        return self._router
+
+    def matches(self, scope: Scope) -> Tuple[Match, Scope]:
+        """Match any request under the prefix."""
+        if scope["type"] == "http":
+            path = scope["path"].removeprefix(scope.get("root_path", ""))
+            if path == self.prefix or path.startswith(self.prefix + "/"):
+                return Match.FULL, {}
+        return Match.NONE, {}
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send):
+        """Dispatch to the loaded router."""
+        await self.router(scope, receive, send)
+
+    def url_path_for(self, name: str, /, **path_params: Any):
+        """Resolve a route name once the module is loaded."""
+        if self._router is None:
+            raise NoMatchFound(name, path_params)
+        return self._router.url_path_for(name, **path_params)
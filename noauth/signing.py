@@ -0,0 +1,169 @@
+"""Signing executors.
+
+ES256 signing is slow enough that signing on the event loop under burst load
+starves every other request. An executor moves signing to a thread or process
+pool. Requests that arrive in the same event loop iteration are signed in one
+executor dispatch.
+
+Workers time each signature and return the durations, which are recorded in
+the signing histogram on the event loop thread.
+"""
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+from time import perf_counter
+from typing import Dict, List, Literal, Optional, Set, Tuple
+
+from aries_askar import Key
+
+from noauth.jwt import Signer
+from noauth.metrics import SIGN_SECONDS
+
+
+ExecutorKind = Literal["inline", "thread", "process"]
+
+# Signed tokens with the seconds each took to sign
+Signed = List[Tuple[str, float]]
+
+# Signers loaded in a process pool worker, keyed by kid and alg
+_worker_signers: Dict[Tuple[str, str], Signer] = {}
+
+
+def _sign_batch(signer: Signer, payloads: List[dict]) -> Signed:
+    """Sign a batch, timing each signature."""
+    signed = []
+    for payload in payloads:
+        start = perf_counter()
+        token = signer.sign(payload)
+        signed.append((token, perf_counter() - start))
+    return signed
+
+
+def _sign_batch_in_worker(
+    kid: str, alg: str, jwk: Optional[bytes], payloads: List[dict]
+) -> Optional[Signed]:
+    """Sign a batch in a process pool worker.
+
+    Keys are sent only to workers that ask for them: without jwk, a worker that
+    has not loaded the key returns None.
+    """
+    signer = _worker_signers.get((kid, alg))
+    if signer is None:
+        if jwk is None:
+            return None
+        signer = _worker_signers[(kid, alg)] = Signer(Key.from_jwk(jwk), alg)
+    return _sign_batch(signer, payloads)
+
+
+class SigningExecutor:
+    """Sign JWTs inline or on a worker pool.
+
+    Pending payloads are split into batches of at most batch_size so that a
+    burst is spread across all workers.
+    """
+
+    def __init__(
+        self,
+        kind: ExecutorKind = "inline",
+        workers: Optional[int] = None,
+        batch_size: int = 32,
+    ):
+        """Initialize the executor."""
+        self.kind = kind
+        self.batch_size = batch_size
+        self.executor: Optional[Executor] = None
+        if kind == "thread":
+            self.executor = ThreadPoolExecutor(workers, thread_name_prefix="noauth-sign")
+        elif kind == "process":
+            self.executor = ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        self._pending: Dict[int, Tuple[Signer, List[dict], List[asyncio.Future]]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._jwks: Dict[str, bytes] = {}
+
+    async def sign(self, signer: Signer, payload: dict) -> str:
+        """Sign payload with signer."""
+        if self.executor is None:
+            start = perf_counter()
+            token = signer.sign(payload)
+            SIGN_SECONDS.observe(perf_counter() - start)
+            return token
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._pending:
+            loop.call_soon(self._flush)
+        _, payloads, futures = self._pending.setdefault(id(signer), (signer, [], []))
+        payloads.append(payload)
+        futures.append(future)
+        return await future
+
+    def _flush(self):
+        """Dispatch all pending payloads in batches per signer."""
+        pending, self._pending = self._pending, {}
+        size = self.batch_size
+        for signer, payloads, futures in pending.values():
+            for start in range(0, len(payloads), size):
+                task = asyncio.create_task(
+                    self._dispatch(
+                        signer,
+                        payloads[start : start + size],
+                        futures[start : start + size],
+                    )
+                )
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(
+        self, signer: Signer, payloads: List[dict], futures: List[asyncio.Future]
+    ):
+        """Sign a batch on the executor and resolve its futures."""
+        loop = asyncio.get_running_loop()
+        try:
+            if self.kind == "process":
+                signed = await loop.run_in_executor(
+                    self.executor,
+                    _sign_batch_in_worker,
+                    signer.kid,
+                    signer.alg,
+                    None,
+                    payloads,
+                )
+                if signed is None:
+                    signed = await loop.run_in_executor(
+                        self.executor,
+                        _sign_batch_in_worker,
+                        signer.kid,
+                        signer.alg,
+                        self._jwk(signer),
+                        payloads,
+                    )
+            else:
+                signed = await loop.run_in_executor(
+                    self.executor, _sign_batch, signer, payloads
+                )
+        except Exception as err:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(err)
+            return
+
+        assert signed is not None
+        for future, (token, seconds) in zip(futures, signed):
+            SIGN_SECONDS.observe(seconds)
+            if not future.done():
+                future.set_result(token)
+
+    def _jwk(self, signer: Signer) -> bytes:
+        """Return the secret JWK of a signer, exported once per key."""
+        jwk = self._jwks.get(signer.kid)
+        if jwk is None:
+            jwk = self._jwks[signer.kid] = signer.key.get_jwk_secret()
+        return jwk
+
+    def close(self):
+        """Shut down the worker pool."""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
@@ -0,0 +1,177 @@
+"""SQLite KV Store shared between worker processes."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+from pathlib import Path
+import sqlite3
+import time
+from typing import Any, Callable, Dict, TypeVar, Union
+
+
+LOGGER = logging.getLogger(__name__)
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expire_time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS kv_expire_time ON kv (expire_time);
+"""
+
+
+class SQLiteKVStore:
+    """KV Store with TTL expiry backed by a SQLite database in WAL mode.
+
+    Every worker process opens the same database file, so a flow started on one
+    worker can be completed on another. Expiry is checked on get; a background
+    task deletes expired rows in batches to reclaim space.
+
+    Statements run on a dedicated thread, so waiting on another worker's write
+    lock never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        sweep_interval: float = 5.0,
+        sweep_batch_size: int = 1000,
+    ):
+        """Initialize the store."""
+        self.path = Path(path)
+        self.sweep_interval = sweep_interval
+        self.sweep_batch_size = sweep_batch_size
+        self._conn: sqlite3.Connection | None = None
+        self._expiry_task: asyncio.Task | None = None
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="noauth-sqlite")
+        self.expirations = 0
+        self.entries = 0
+        self.sweep_errors = 0
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run fn on the store thread."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _connect(self):
+        """Connect and create the schema."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+
+    async def open(self):
+        """Open the store."""
+        await self._run(self._connect)
+        self._expiry_task = asyncio.create_task(self._expiry_loop())
+        return self
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Get connection."""
+        assert self._conn is not None, "Store is not open"
+        return self._conn
+
+    @property
+    def expiry_task(self) -> asyncio.Task:
+        """Get expiry task."""
+        assert self._expiry_task is not None, "Store is not open"
+        return self._expiry_task
+
+    def _sweep(self) -> int:
+        """Delete one batch of expired rows, returning the number deleted."""
+        cursor = self.conn.execute(
+            "DELETE FROM kv WHERE rowid IN "
+            "(SELECT rowid FROM kv WHERE expire_time <= ? LIMIT ?)",
+            (time.time(), self.sweep_batch_size),
+        )
+        self.expirations += cursor.rowcount
+        return cursor.rowcount
+
+    def _count(self) -> int:
+        """Count rows."""
+        (entries,) = self.conn.execute("SELECT COUNT(*) FROM kv").fetchone()
+        return entries
+
+    async def _expiry_loop(self):
+        """Loop to delete expired rows and refresh the entry count."""
+        while True:
+            try:
+                while await self._run(self._sweep) >= self.sweep_batch_size:
+                    # More to delete; yield between batches
+                    await asyncio.sleep(0)
+                self.entries = await self._run(self._count)
+            except sqlite3.Error as error:
+                # E.g. locked past busy_timeout by other workers; retry next interval
+                self.sweep_errors += 1
+                LOGGER.warning("Expiry sweep failed, retrying: %s", error)
+            await asyncio.sleep(self.sweep_interval)
+
+    def _execute(self, sql: str, params: tuple) -> Any:
+        """Execute a statement and fetch one row."""
+        return self.conn.execute(sql, params).fetchone()
+
+    async def set(self, key: str, value: Any, ttl: float):
+        """Set a value."""
+        await self._run(
+            self._execute,
+            "INSERT OR REPLACE INTO kv (key, value, expire_time) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + ttl),
+        )
+
+    async def get(self, key: str) -> Any:
+        """Get a value."""
+        row = await self._run(
+            self._execute,
+            "SELECT value FROM kv WHERE key = ? AND expire_time > ?",
+            (key, time.time()),
+        )
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    async def delete(self, key: str):
+        """Delete a value."""
+        await self._run(self._execute, "DELETE FROM kv WHERE key = ?", (key,))
+
+    async def pop(self, key: str) -> Any:
+        """Get and delete a value.
+
+        A single DELETE ... RETURNING statement, so only one worker can win.
+        """
+        row = await self._run(
+            self._execute,
+            "DELETE FROM kv WHERE key = ? RETURNING value, expire_time",
+            (key,),
+        )
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters for monitoring.
+
+        The entry count is refreshed every sweep_interval; expirations only
+        count rows swept by this process.
+        """
+        return {
+            "entries": self.entries,
+            "expirations": self.expirations,
+            "sweep_errors": self.sweep_errors,
+        }
+
+    async def close(self):
+        """Close the store."""
+        self.expiry_task.cancel()
+        try:
+            await self.expiry_task
+        except asyncio.CancelledError:
+            pass
+        await self._run(self.conn.close)
+        self._executor.shutdown()
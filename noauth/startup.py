@@ -0,0 +1,45 @@
+"""Startup timing.
+
+Phases are timed from the first import of noauth.main until the app is ready
+to serve, and logged once at INFO.
+"""
+
+from contextlib import contextmanager
+import logging
+from time import perf_counter
+from typing import Dict, Iterator
+
+
+LOGGER = logging.getLogger(__name__)
+
+STARTED = perf_counter()
+PHASES: Dict[str, float] = {}
+
+
+def mark(name: str):
+    """Record the time elapsed since startup began as a phase."""
+    PHASES[name] = perf_counter() - STARTED
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a phase of startup."""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        PHASES[name] = perf_counter() - start
+
+
+def ready():
+    """Record and log the time until the app could serve."""
+    mark("total")
+    LOGGER.info(
+        "Ready in %.1f ms (%s)",
+        PHASES["total"] * 1000,
+        ", ".join(
+            f"{name} {seconds * 1000:.1f} ms"
+            for name, seconds in PHASES.items()
+            if name != "total"
+        ),
+    )
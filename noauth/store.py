@@ -2,41 +2,149 @@
 
 import asyncio
 import heapq
+from itertools import count
 import logging
+import sys
 import time
-from typing import Any, Dict, List, Tuple
+from typing import (
+    Any,
+    Dict,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Set,
+    Tuple,
+)
 
 
 LOGGER = logging.getLogger(__name__)
 
+EvictionPolicy = Literal["expiry", "lru"]
+
+# Heaps smaller than this are never compacted; rebuilding them buys nothing
+MIN_COMPACT_SIZE = 1024
+
+
+def approximate_size(value: Any, depth: int = 2) -> int:
+    """Approximate the memory used by a value.
+
+    Containers and object attributes are followed a couple of levels deep; this
+    is meant for budgeting, not accounting.
+    """
+    size = sys.getsizeof(value)
+    if depth <= 0:
+        return size
+    if isinstance(value, dict):
+        size += sum(
+            approximate_size(k, depth - 1) + approximate_size(v, depth - 1)
+            for k, v in value.items()
+        )
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item, depth - 1) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += approximate_size(vars(value), depth - 1)
+    return size
+
+
+class Store(Protocol):
+    """KV store backend with TTL expiry.
+
+    Values must be JSON serializable so that any backend can hold them.
+    """
+
+    async def open(self) -> "Store":
+        """Open the store."""
+        ...
+
+    async def close(self):
+        """Close the store."""
+        ...
+
+    async def set(self, key: str, value: Any, ttl: float):
+        """Set a value that expires after ttl seconds."""
+        ...
+
+    async def get(self, key: str) -> Any:
+        """Get a value, or None if missing or expired."""
+        ...
+
+    async def delete(self, key: str):
+        """Delete a value."""
+        ...
+
+    async def pop(self, key: str) -> Any:
+        """Atomically get and delete a value, or None if missing or expired."""
+        ...
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters for monitoring."""
+        ...
+
+    @property
+    def expiry_task(self) -> asyncio.Task:
+        """Return the background expiry task."""
+        ...
+
+
+class Entry(NamedTuple):
+    """Stored value with its expiry time and generation."""
+
+    value: Any
+    expire_time: float
+    generation: int
+    size: int
+
 
 class TemporalKVStore:
-    """KV Store with TTL expiry."""
+    """KV Store with TTL expiry.
+
+    All operations are synchronous dict and heap manipulations that never await,
+    so no lock is needed on a single event loop. Expiry is checked lazily on get;
+    the expiry loop only reclaims memory. Each set is tagged with a generation so
+    heap entries left behind by a re-set or delete are recognized as stale and
+    skipped.
 
-    def __init__(self):
+    The store may be bounded by entry count and by an approximate byte budget.
+    When full, the entry expiring soonest ("expiry") or the least recently used
+    entry ("lru") is evicted. Entry sizes, and so the bytes counter, are only
+    tracked when max_bytes is set. The heap is rebuilt once the share of stale
+    entries in it passes compact_threshold.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        eviction: EvictionPolicy = "expiry",
+        compact_threshold: float = 0.5,
+    ):
         """Initialize the store."""
-        self.store: Dict[str, Any] = {}
-        self.expiry_heap: List[Tuple[float, str]] = []
-        self._lock: asyncio.Lock | None = None
+        self.store: Dict[str, Entry] = {}
+        self.expiry_heap: List[Tuple[float, int, str]] = []
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+        self.compact_threshold = compact_threshold
+        self.bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.compactions = 0
+        self.rejections = 0
+        self._generation = count()
         self._expiry_task: asyncio.Task | None = None
         self._new_expiry_event: asyncio.Event | None = None
         self._ready_event: asyncio.Event | None = None
 
     async def open(self):
         """Open the store."""
-        self._lock = asyncio.Lock()
         self._ready_event = asyncio.Event()
         self._new_expiry_event = asyncio.Event()
         self._expiry_task = asyncio.create_task(self._expiry_loop())
         await self._ready_event.wait()
         return self
 
-    @property
-    def lock(self) -> asyncio.Lock:
-        """Get lock."""
-        assert self._lock is not None, "Store is not open"
-        return self._lock
-
     @property
     def expiry_task(self) -> asyncio.Task:
         """Get expiry task."""
@@ -49,59 +157,198 @@ class TemporalKVStore:
         assert self._new_expiry_event is not None, "Store is not open"
         return self._new_expiry_event
 
+    def stats(self) -> Dict[str, int]:
+        """Return counters for monitoring."""
+        return {
+            "entries": len(self.store),
+            "bytes": self.bytes,
+            "heap_size": len(self.expiry_heap),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "compactions": self.compactions,
+            "rejections": self.rejections,
+        }
+
+    def _remove(self, key: str) -> Optional[Entry]:
+        """Remove an entry, keeping the byte count in step."""
+        entry = self.store.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+        return entry
+
+    def _expire(self, now: float):
+        """Pop all expired or stale entries from the top of the heap."""
+        heap = self.expiry_heap
+        while heap:
+            expire_time, generation, key = heap[0]
+            entry = self.store.get(key)
+            if entry is not None and entry.generation == generation:
+                if now < expire_time:
+                    return
+                self._remove(key)
+                self.expirations += 1
+            heapq.heappop(heap)
+
+    def _index(self, key: str, entry: Entry) -> bool:
+        """Track a new entry for expiry; return True if the loop must reschedule."""
+        heapq.heappush(self.expiry_heap, (entry.expire_time, entry.generation, key))
+        return self.expiry_heap[0][1] == entry.generation
+
+    def _soonest(self, exclude: str) -> Optional[str]:
+        """Return the live key other than exclude expiring soonest.
+
+        Its heap entry is dropped; that of exclude is kept.
+        """
+        heap = self.expiry_heap
+        kept = None
+        try:
+            while heap:
+                item = heapq.heappop(heap)
+                _, generation, key = item
+                entry = self.store.get(key)
+                if entry is None or entry.generation != generation:
+                    continue
+                if key == exclude:
+                    kept = item
+                    continue
+                return key
+            return None
+        finally:
+            if kept is not None:
+                heapq.heappush(heap, kept)
+
+    def _next_expiry(self) -> Optional[float]:
+        """Return when the expiry loop should next wake, if anything is tracked."""
+        return self.expiry_heap[0][0] if self.expiry_heap else None
+
+    def _evict_one(self, exclude: str) -> bool:
+        """Evict one live entry other than exclude according to the policy.
+
+        Return False if there is nothing else to evict.
+        """
+        if self.eviction == "lru":
+            key = next((key for key in self.store if key != exclude), None)
+        else:
+            key = self._soonest(exclude)
+        if key is None:
+            return False
+        self._remove(key)
+        self.evictions += 1
+        return True
+
+    def _over_bounds(self) -> bool:
+        """Return True if the store exceeds max_entries or max_bytes."""
+        return (self.max_entries is not None and len(self.store) > self.max_entries) or (
+            self.max_bytes is not None and self.bytes > self.max_bytes
+        )
+
+    def _evict(self, inserted: str):
+        """Evict other entries until the store is within its bounds.
+
+        The entry just inserted is never evicted to make room for itself; if it
+        cannot fit on its own, the insert is rejected.
+        """
+        size = self.store[inserted].size
+        if self.max_entries == 0 or (
+            self.max_bytes is not None and size > self.max_bytes
+        ):
+            self._reject(inserted)
+            return
+        while self._over_bounds():
+            if not self._evict_one(inserted):
+                self._reject(inserted)
+                return
+
+    def _reject(self, key: str):
+        """Drop an entry that can never fit within the store bounds."""
+        self._remove(key)
+        self.rejections += 1
+        LOGGER.warning("Rejected %s: larger than the store bounds", key)
+
+    def _maybe_compact(self):
+        """Rebuild the heap from live entries if it is mostly stale."""
+        heap_size = len(self.expiry_heap)
+        if heap_size < MIN_COMPACT_SIZE:
+            return
+        dead = heap_size - len(self.store)
+        if dead / heap_size <= self.compact_threshold:
+            return
+        LOGGER.debug("Compacting expiry heap: %d of %d entries stale", dead, heap_size)
+        self.expiry_heap = [
+            (entry.expire_time, entry.generation, key)
+            for key, entry in self.store.items()
+        ]
+        heapq.heapify(self.expiry_heap)
+        self.compactions += 1
+
     async def _expiry_loop(self):
         """Loop to handle expired tasks."""
         assert self._ready_event
         self._ready_event.set()
         while True:
-            if not self.expiry_heap:
-                LOGGER.debug("No items, waiting until one is set")
-                await self.new_expiry_event.wait()
+            self.new_expiry_event.clear()
+            self._expire(time.time())
 
-            async with self.lock:
-                self.new_expiry_event.clear()
-                expire_time, key = self.expiry_heap[0]
-                now = time.time()
-                if now >= expire_time:
-                    LOGGER.debug("Expiring key: %s", key)
-                    heapq.heappop(self.expiry_heap)
-                    self.store.pop(key, None)
-                    continue
-                else:
-                    sleep_time = expire_time - now
+            next_expiry = self._next_expiry()
+            if next_expiry is None:
+                await self.new_expiry_event.wait()
+                continue
 
-            LOGGER.debug("Sleep: wait for %s to expire or new item", key)
+            sleep_time = next_expiry - time.time()
             try:
-                await asyncio.wait_for(
-                    self.new_expiry_event.wait(),
-                    sleep_time,
-                )
+                await asyncio.wait_for(self.new_expiry_event.wait(), sleep_time)
             except asyncio.TimeoutError:
-                LOGGER.debug("Awake: item ready to expire")
-            else:
-                LOGGER.debug("Awake: New item")
+                pass
 
     async def set(self, key: str, value: Any, ttl: float):
         """Set a value."""
-        async with self.lock:
-            LOGGER.debug("Set: %s", key)
-            self.store[key] = value
-            expire_time = time.time() + ttl
-            heapq.heappush(self.expiry_heap, (expire_time, key))
+        expire_time = time.time() + ttl
+        generation = next(self._generation)
+        size = 0
+        if self.max_bytes is not None:
+            # Sizing walks the value, so skip it unless a byte budget is set
+            size = approximate_size(key) + approximate_size(value)
+        # Remove first so a re-set moves the key to the most recently used end
+        self._remove(key)
+        self.store[key] = Entry(value, expire_time, generation, size)
+        self.bytes += size
+        reschedule = self._index(key, self.store[key])
+        self._evict(key)
+        self._maybe_compact()
+        if reschedule:
+            # New soonest expiry; wake the loop to reschedule
             self.new_expiry_event.set()
 
     async def get(self, key: str) -> Any:
         """Get a value."""
-        async with self.lock:
-            LOGGER.debug("Get: %s", key)
-            return self.store.get(key)
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        if time.time() >= entry.expire_time:
+            self._remove(key)
+            self.expirations += 1
+            return None
+        if self.eviction == "lru":
+            # Dicts keep insertion order; re-inserting marks the key as recently used
+            del self.store[key]
+            self.store[key] = entry
+        return entry.value
 
     async def delete(self, key: str):
         """Delete a value."""
-        async with self.lock:
-            LOGGER.debug("Delete: %s", key)
-            self.store.pop(key, None)
-            self.new_expiry_event.set()
+        self._remove(key)
+        self._maybe_compact()
+
+    async def pop(self, key: str) -> Any:
+        """Get and delete a value."""
+        entry = self._remove(key)
+        if entry is None:
+            return None
+        self._maybe_compact()
+        if time.time() >= entry.expire_time:
+            self.expirations += 1
+            return None
+        return entry.value
 
     async def close(self):
         """Close the store."""
@@ -112,6 +359,158 @@ class TemporalKVStore:
             pass
 
 
+class TimingWheelKVStore(TemporalKVStore):
+    """KV Store with TTL expiry tracked in per-tick buckets.
+
+    Keys are bucketed by the tick in which they expire, so adding a key to an
+    existing bucket and removing a key are O(1), and everything due in a tick is
+    expired in one batch. Buckets are keyed by absolute tick number, which plays
+    the part of a wheel's slots without overflow levels for long TTLs; a heap of
+    bucket ticks orders them, so expiry and eviction only touch the earliest
+    buckets however many are pending. Keys expire up to one tick late in the
+    background; get still checks the exact expiry time.
+    """
+
+    def __init__(self, *args, tick: float = 1.0, **kwargs):
+        """Initialize the store."""
+        super().__init__(*args, **kwargs)
+        self.tick = tick
+        self.buckets: Dict[int, Set[str]] = {}
+        # Ticks of buckets created since they were last expired; a bucket emptied
+        # by removals is dropped while its tick stays queued until it passes
+        self.tick_heap: List[int] = []
+        self.queued_ticks: Set[int] = set()
+
+    def _tick(self, expire_time: float) -> int:
+        """Return the tick after which an expiry time has passed."""
+        return int(expire_time // self.tick) + 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters for monitoring."""
+        stats = super().stats()
+        del stats["heap_size"]
+        stats["wheel_buckets"] = len(self.buckets)
+        return stats
+
+    def _index(self, key: str, entry: Entry) -> bool:
+        """Add the key to the bucket for its tick."""
+        tick = self._tick(entry.expire_time)
+        bucket = self.buckets.get(tick)
+        if bucket is not None:
+            bucket.add(key)
+            return False
+        self.buckets[tick] = {key}
+        if tick in self.queued_ticks:
+            return False
+        self.queued_ticks.add(tick)
+        heapq.heappush(self.tick_heap, tick)
+        return self.tick_heap[0] == tick
+
+    def _remove(self, key: str) -> Optional[Entry]:
+        """Remove an entry and its bucket membership."""
+        entry = super()._remove(key)
+        if entry is not None:
+            tick = self._tick(entry.expire_time)
+            bucket = self.buckets.get(tick)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[tick]
+        return entry
+
+    def _pop_tick(self) -> int:
+        """Dequeue the earliest tick."""
+        tick = heapq.heappop(self.tick_heap)
+        self.queued_ticks.discard(tick)
+        return tick
+
+    def _first_tick(self) -> Optional[int]:
+        """Return the earliest tick with a bucket, dequeuing emptied ones."""
+        heap = self.tick_heap
+        while heap and heap[0] not in self.buckets:
+            self._pop_tick()
+        return heap[0] if heap else None
+
+    def _soonest(self, exclude: str) -> Optional[str]:
+        """Return a key other than exclude from the earliest bucket holding one."""
+        first = self._first_tick()
+        if first is None:
+            return None
+        for key in self.buckets[first]:
+            if key != exclude:
+                return key
+        # The earliest bucket holds only exclude; look one bucket further
+        heapq.heappop(self.tick_heap)
+        try:
+            second = self._first_tick()
+            return None if second is None else next(iter(self.buckets[second]))
+        finally:
+            heapq.heappush(self.tick_heap, first)
+
+    def _next_expiry(self) -> Optional[float]:
+        """Return the end of the earliest non-empty tick."""
+        first = self._first_tick()
+        return None if first is None else first * self.tick
+
+    def _expire(self, now: float):
+        """Expire every bucket whose tick has passed."""
+        current = int(now // self.tick)
+        heap = self.tick_heap
+        while heap and heap[0] <= current:
+            keys = self.buckets.pop(self._pop_tick(), ())
+            for key in keys:
+                self.bytes -= self.store.pop(key).size
+            self.expirations += len(keys)
+
+    def _maybe_compact(self):
+        """Buckets never hold stale keys, so there is nothing to compact."""
+
+
+class PrefixedStore:
+    """View of a shared store with every key under a prefix.
+
+    Lets tenants share one backend, and its expiry task, without seeing each
+    other's flows.
+    """
+
+    def __init__(self, store: Store, prefix: str):
+        """Initialize the view."""
+        self.backend = store
+        self.prefix = prefix
+
+    async def open(self) -> "PrefixedStore":
+        """The shared store is opened by its owner."""
+        return self
+
+    async def close(self):
+        """The shared store is closed by its owner."""
+
+    async def set(self, key: str, value: Any, ttl: float):
+        """Set a value."""
+        await self.backend.set(self.prefix + key, value, ttl)
+
+    async def get(self, key: str) -> Any:
+        """Get a value."""
+        return await self.backend.get(self.prefix + key)
+
+    async def delete(self, key: str):
+        """Delete a value."""
+        await self.backend.delete(self.prefix + key)
+
+    async def pop(self, key: str) -> Any:
+        """Get and delete a value."""
+        return await self.backend.pop(self.prefix + key)
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters of the shared store."""
+        return self.backend.stats()
+
+    @property
+    def expiry_task(self) -> asyncio.Task:
+        """Return the expiry task of the shared store."""
+        return self.backend.expiry_task
+
+
 async def main():
     """Example."""
     kv = TemporalKVStore()
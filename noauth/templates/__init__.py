@@ -1,7 +1,43 @@
-"""Page Templates."""
+"""Page Templates.
 
+Jinja2 is imported and the templates loaded on first render. Running
+`python -m noauth.templates` compiles the templates ahead of time into
+templates/compiled, which is then preferred over the sources.
+"""
+
+from functools import cache
 from pathlib import Path
-from fastapi.templating import Jinja2Templates
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import jinja2
+    from fastapi.templating import Jinja2Templates
+
+
+TEMPLATES_DIR = Path(__file__).parent
+COMPILED_DIR = TEMPLATES_DIR / "compiled"
+
+
+def environment(precompiled: bool = True) -> "jinja2.Environment":
+    """Return a Jinja2 environment for the templates."""
+    import jinja2
+
+    loader: jinja2.BaseLoader = jinja2.FileSystemLoader(TEMPLATES_DIR)
+    if precompiled and COMPILED_DIR.is_dir():
+        loader = jinja2.ChoiceLoader([jinja2.ModuleLoader(COMPILED_DIR), loader])
+    return jinja2.Environment(loader=loader, autoescape=True)
+
+
+@cache
+def get_templates() -> "Jinja2Templates":
+    """Return the templates, loading them on first use."""
+    from fastapi.templating import Jinja2Templates
+
+    return Jinja2Templates(env=environment())
 
 
-templates = Jinja2Templates(directory=Path(__file__).parent)
+def compile_templates(target: Path = COMPILED_DIR):
+    """Compile the templates to Python modules in target."""
+    environment(precompiled=False).compile_templates(
+        target, zip=None, filter_func=lambda name: name.endswith(".html")
+    )
@@ -0,0 +1,7 @@
+"""Compile the templates: python -m noauth.templates."""
+
+from noauth.templates import COMPILED_DIR, compile_templates
+
+
+compile_templates()
+print(f"Compiled templates to {COMPILED_DIR}")
@@ -0,0 +1,59 @@
+"""Reuse of signed tokens for repeated identical requests."""
+
+from collections import OrderedDict
+import json
+from typing import Any, Dict, Mapping, NamedTuple, Optional
+
+
+class CachedToken(NamedTuple):
+    """Signed token with its validity window."""
+
+    token: str
+    iat: int
+    exp: int
+
+
+class TokenCache:
+    """Bounded LRU cache of signed tokens keyed by canonical claims.
+
+    A token is reused only while more than min_remaining of its lifetime is left,
+    so callers always receive a token valid for a useful while.
+    """
+
+    def __init__(self, max_entries: int = 1024, min_remaining: float = 0.5):
+        """Initialize the cache."""
+        self.max_entries = max_entries
+        self.min_remaining = min_remaining
+        self.tokens: "OrderedDict[str, CachedToken]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(claims: Mapping[str, Any], valid_for: int, issuer: str, kid: str) -> str:
+        """Return the canonical cache key for a token request."""
+        return json.dumps(
+            [issuer, kid, valid_for, claims], sort_keys=True, separators=(",", ":")
+        )
+
+    def get(self, key: str, now: float) -> Optional[str]:
+        """Return a cached token that is still fresh enough, counting the lookup."""
+        cached = self.tokens.get(key)
+        if cached is not None:
+            if cached.exp - now > (cached.exp - cached.iat) * self.min_remaining:
+                self.tokens.move_to_end(key)
+                self.hits += 1
+                return cached.token
+            del self.tokens[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, token: str, iat: int, exp: int):
+        """Cache a token, evicting the least recently used beyond max_entries."""
+        self.tokens[key] = CachedToken(token, iat, exp)
+        self.tokens.move_to_end(key)
+        while len(self.tokens) > self.max_entries:
+            self.tokens.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters for monitoring."""
+        return {"entries": len(self.tokens), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,17 @@
+import shutil
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from noauth.main import app
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    shutil.copy(ROOT / "default.noauth.toml", tmp_path / "noauth.toml")
+    monkeypatch.chdir(tmp_path)
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,15 @@
+from noauth.claims import ScopeClaims
+
+
+def test_scope_claims_normalized():
+    resolver = ScopeClaims(
+        {"name": "alice", "roles": ["admin"]},
+        {"a": {"x": "a", "y": "a"}, "b": {"x": "b"}},
+    )
+    claims = resolver("openid  b a b unknown")
+    assert claims == {"name": "alice", "roles": ["admin"], "x": "b", "y": "a"}
+    assert resolver.normalize("b  a b") == resolver.normalize("a b") == ("a", "b")
+
+    claims["name"] = "bob"
+    assert resolver("a b")["name"] == "alice"
+    assert resolver._merged.cache_info().hits == 1
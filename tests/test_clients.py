@@ -0,0 +1,156 @@
+import json
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from noauth import dependencies, jwt
+from noauth.config import ClientConfig
+
+CLIENTS = """
+[noauth.clients.a]
+client_secret = "secret-a"
+id_token_signed_response_alg = "ES256"
+redirect_uris = ["http://a/*"]
+default = { role = "a" }
+
+[noauth.clients.b]
+client_secret = "secret-b"
+id_token_signed_response_alg = "EdDSA"
+headless = true
+"""
+
+
+@pytest.fixture
+def clients(client):
+    config = Path("noauth.toml")
+    config.write_text(config.read_text() + CLIENTS)
+    assert dependencies.reload()
+    return client
+
+
+def login(client, client_id: str, redirect_uri: str, scope: str = "openid"):
+    return client.get(
+        "/oidc/authorize",
+        params={
+            "response_type": "code",
+            "client_id": client_id,
+            "redirect_uri": redirect_uri,
+            "scope": scope,
+            "state": "xyz",
+            "prompt": "none",
+        },
+        follow_redirects=False,
+    )
+
+
+def redeem(client, client_id: str, secret: str, redirect_uri: str, code: str):
+    return client.post(
+        "/oidc/token",
+        data={
+            "grant_type": "authorization_code",
+            "client_id": client_id,
+            "client_secret": secret,
+            "redirect_uri": redirect_uri,
+            "code": code,
+        },
+    )
+
+
+def code_of(response) -> str:
+    return parse_qs(urlparse(response.headers["location"]).query)["code"][0]
+
+
+def test_unknown_client_and_redirect(clients):
+    assert login(clients, "nope", "http://a/cb").status_code == 400
+    assert login(clients, "a", "http://evil/cb").status_code == 400
+    assert login(clients, "a", "http://a/cb").status_code == 303
+
+
+@pytest.mark.parametrize(
+    "redirect_uri, allowed",
+    [
+        ("http://localhost:8080/callback", True),
+        ("http://localhost:1@evil.com/callback", False),
+        ("http://localhost:80.evil.com/callback", False),
+        ("http://localhost:8080/callback#fragment", False),
+        ("https://app.example.com/cb", True),
+        ("https://app.example.com.evil.com/cb", False),
+        ("https://evil.com/.example.com/cb", False),
+        ("https://app.example.com/cb?x=1", True),
+        ("https://app.example.com/cbzx=1", False),
+        ("https://app.example.com/cb?x=2", False),
+        ("https://app.example.com/c[ab]", True),
+        ("https://app.example.com/ca", False),
+    ],
+)
+def test_redirect_uri_wildcards_stay_in_component(redirect_uri, allowed):
+    client = ClientConfig(
+        client_secret="secret",
+        redirect_uris=[
+            "http://localhost:*/callback",
+            "https://*.example.com/cb",
+            "https://app.example.com/cb?x=1",
+            "https://app.example.com/c[ab]",
+        ],
+    )
+    assert client.allows_redirect_uri(redirect_uri) is allowed
+
+
+def test_client_secret_and_binding(clients):
+    code = code_of(login(clients, "a", "http://a/cb"))
+    assert redeem(clients, "a", "wrong", "http://a/cb", code).status_code == 401
+    assert redeem(clients, "b", "secret-b", "http://a/cb", code).status_code == 400
+
+
+def test_client_secret_basic(clients):
+    code = code_of(login(clients, "a", "http://a/cb"))
+    data = {"grant_type": "authorization_code", "redirect_uri": "http://a/cb"}
+    response = clients.post(
+        "/oidc/token", data={**data, "code": code}, auth=("a", "wrong")
+    )
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == 'Basic realm="noauth"'
+    response = clients.post(
+        "/oidc/token", data={**data, "code": code}, auth=("a", "secret-a")
+    )
+    assert response.status_code == 200
+    assert "id_token" in response.json()
+
+    code = code_of(login(clients, "a", "http://a/cb"))
+    assert clients.post("/oidc/token", data={**data, "code": code}).status_code == 401
+
+
+def test_per_client_alg_and_claims(clients):
+    assert len(clients.get("/.well-known/jwks.json").json()["keys"]) == 2
+
+    code = code_of(login(clients, "a", "http://a/cb"))
+    body = redeem(clients, "a", "secret-a", "http://a/cb", code).json()
+    enc_headers, enc_payload, _ = body["id_token"].split(".")
+    assert json.loads(jwt.base64_urldecode_no_padding(enc_headers))["alg"] == "ES256"
+    assert json.loads(jwt.base64_urldecode_no_padding(enc_payload))["role"] == "a"
+
+    code = code_of(login(clients, "b", "http://b/cb"))
+    body = redeem(clients, "b", "secret-b", "http://b/cb", code).json()
+    enc_headers, enc_payload, _ = body["id_token"].split(".")
+    assert json.loads(jwt.base64_urldecode_no_padding(enc_headers))["alg"] == "EdDSA"
+    assert "role" not in json.loads(jwt.base64_urldecode_no_padding(enc_payload))
+
+
+def test_refresh_token_bound_to_client(clients):
+    code = code_of(login(clients, "a", "http://a/cb", "openid offline_access"))
+    rt = redeem(clients, "a", "secret-a", "http://a/cb", code).json()["refresh_token"]
+
+    def refresh(client_id: str, secret: str):
+        return clients.post(
+            "/oidc/token",
+            data={
+                "grant_type": "refresh_token",
+                "client_id": client_id,
+                "client_secret": secret,
+                "refresh_token": rt,
+            },
+        )
+
+    assert refresh("b", "secret-b").status_code == 400
+    assert refresh("a", "secret-a").status_code == 200
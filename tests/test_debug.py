@@ -0,0 +1,57 @@
+from pathlib import Path
+import tracemalloc
+
+import pytest
+
+from noauth import dependencies
+
+DEBUG = """
+[noauth.debug]
+enabled = true
+token = "debugtoken"
+"""
+AUTH = {"Authorization": "Bearer debugtoken"}
+
+
+@pytest.fixture
+def debug(client):
+    config = Path("noauth.toml")
+    config.write_text(config.read_text() + DEBUG)
+    assert dependencies.reload()
+    yield client
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def test_disabled(client):
+    assert client.get("/debug/profile", headers=AUTH).status_code == 404
+    assert client.get("/debug/memory", headers=AUTH).status_code == 404
+
+
+def test_requires_token(debug):
+    assert debug.get("/debug/memory").status_code == 401
+    response = debug.get("/debug/memory", headers={"Authorization": "Bearer nope"})
+    assert response.status_code == 401
+
+
+def test_profile(debug):
+    response = debug.get("/debug/profile", params={"seconds": 0.05}, headers=AUTH)
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines
+    stack, _, count = lines[0].rpartition(" ")
+    assert ";" in stack
+    assert int(count) > 0
+
+
+def test_memory(debug):
+    assert debug.get("/debug/memory", headers=AUTH).status_code == 202
+    debug.get("/manual/api/token")
+    body = debug.get("/debug/memory", params={"limit": 5}, headers=AUTH).json()
+    assert body["traced"] > 0
+    assert len(body["other"]["allocators"]) == 5
+    assert body["store"]["entries"] == 0
+
+    body = debug.get("/debug/memory", params={"stop": True}, headers=AUTH).json()
+    assert body == {"tracing": False}
+    assert not tracemalloc.is_tracing()
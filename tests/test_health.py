@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+import pytest
+
+from noauth import dependencies
+from noauth.health import LagSampler
+
+
+def test_health_endpoints(client):
+    for path in ("/healthz", "/readyz"):
+        response = client.get(path)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["status"] == "ok"
+        assert body["expiry_task"] is True
+        assert body["store_entries"] == 0
+        assert body["loop_lag"] >= 0
+
+
+def test_expiry_task_dead(client):
+    async def crash():
+        dependencies._store.expiry_task.cancel()
+        await asyncio.sleep(0)
+
+    client.portal.call(crash)
+    assert client.get("/healthz").status_code == 503
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["expiry_task"] is False
+
+
+@pytest.mark.asyncio
+async def test_lag_sampler():
+    sampler = LagSampler(interval=0.01).start()
+    await asyncio.sleep(0.02)
+    time.sleep(0.1)
+    assert sampler.lag >= 0.05
+    await asyncio.sleep(0.02)
+    assert sampler.max_lag >= 0.05
+    await sampler.stop()
+
+
+def test_readyz_lag_threshold(client):
+    assert client.get("/readyz", params={"max_lag": -1}).status_code == 503
@@ -0,0 +1,66 @@
+import base64
+import json
+
+from aries_askar import Key, KeyAlg
+import pytest
+
+from noauth import codec, jwt
+
+
+def test_signer_matches_sign():
+    key = Key.generate(KeyAlg.P256)
+    signer = jwt.Signer(key, "ES256")
+    payload = {"sub": "alice", "iat": 0}
+
+    token = signer.sign(payload)
+    enc_headers, enc_payload, sig = token.split(".")
+
+    expected = jwt.sign(
+        headers={"alg": "ES256", "kid": key.get_jwk_thumbprint()},
+        payload=payload,
+        key=key,
+    )
+    assert enc_headers == expected.split(".")[0]
+    assert json.loads(jwt.base64_urldecode_no_padding(enc_payload)) == payload
+    assert key.verify_signature(
+        f"{enc_headers}.{enc_payload}",
+        base64.urlsafe_b64decode(sig + "=" * (-len(sig) % 4)),
+    )
+
+
+@pytest.mark.parametrize("name", ["json", "orjson"])
+def test_decode_round_trip(name):
+    if name == "orjson":
+        pytest.importorskip("orjson")
+    selected = codec.NAME
+    key = Key.generate(KeyAlg.ED25519)
+    signer = jwt.Signer(key, "EdDSA")
+    payload = {"sub": "alice", "roles": ["admin"] * 100, "name": "Zoë"}
+
+    try:
+        codec.use(name)
+        headers, decoded, sig = jwt.decode(signer.sign(payload))
+    finally:
+        codec.use(selected)
+    assert headers == signer.headers
+    assert decoded == payload
+    assert key.verify_signature(signer.signing_input(payload), sig)
+
+
+def test_b64_round_trip_every_padding():
+    for length in range(8):
+        value = bytes(range(250, 250 - length, -1))
+        assert jwt.b64decode(jwt.b64encode(value)) == value
+
+
+def test_codecs_agree():
+    pytest.importorskip("orjson")
+    selected = codec.NAME
+    payload = {"sub": "alice", "iat": 0, "roles": ["a", "b"], "name": "Zoë"}
+    try:
+        codec.use("json")
+        stdlib = codec.dumps(payload)
+        codec.use("orjson")
+        assert codec.dumps(payload) == stdlib
+    finally:
+        codec.use(selected)
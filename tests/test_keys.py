@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from aries_askar import KeyAlg
+
+from noauth.keys import load_or_generate_key
+
+
+def test_generate_without_path():
+    one = load_or_generate_key(None, "ES256")
+    two = load_or_generate_key(None, "ES256")
+    assert one.algorithm == KeyAlg.P256
+    assert one.get_jwk_thumbprint() != two.get_jwk_thumbprint()
+
+
+def test_persisted_key_is_stable(tmp_path):
+    path = tmp_path / "keys" / "key.jwk"
+    one = load_or_generate_key(path, "EdDSA")
+    two = load_or_generate_key(path, "EdDSA")
+    assert one.get_jwk_thumbprint() == two.get_jwk_thumbprint()
+    assert [p.name for p in path.parent.iterdir()] == ["key.jwk"]
+
+
+def test_concurrent_generation(tmp_path):
+    path = tmp_path / "key.jwk"
+    with ThreadPoolExecutor(8) as pool:
+        keys = list(pool.map(lambda _: load_or_generate_key(path, "ES256"), range(8)))
+    assert len({key.get_jwk_thumbprint() for key in keys}) == 1
+
+
+def test_alg_mismatch(tmp_path):
+    path = tmp_path / "key.jwk"
+    load_or_generate_key(path, "ES256")
+    with pytest.raises(ValueError):
+        load_or_generate_key(path, "EdDSA")
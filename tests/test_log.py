@@ -0,0 +1,37 @@
+import json
+import logging
+import logging.config
+from logging.handlers import QueueHandler
+
+from uvicorn.config import LOGGING_CONFIG
+
+from noauth import log
+from noauth.log import JSONFormatter
+
+
+def test_json_formatter():
+    record = logging.LogRecord(
+        "noauth.test", logging.INFO, __file__, 1, "hi %s", ("there",), None
+    )
+    value = json.loads(JSONFormatter().format(record))
+    assert value["message"] == "hi there"
+    assert value["level"] == "INFO"
+    assert value["logger"] == "noauth.test"
+
+
+def test_uvicorn_loggers_routed_through_queue(monkeypatch):
+    logging.config.dictConfig(LOGGING_CONFIG)
+    monkeypatch.setenv("NOAUTH_LOG_LEVEL", "ERROR")
+    log.configure()
+    try:
+        for name in ("uvicorn.access", "uvicorn.error"):
+            logger = logging.getLogger(name)
+            assert logger.handlers == []
+            assert logger.propagate
+            assert logger.level == logging.ERROR
+        (handler,) = logging.getLogger("uvicorn").handlers
+        assert isinstance(handler, QueueHandler)
+        assert not logging.getLogger("uvicorn.access").isEnabledFor(logging.INFO)
+    finally:
+        monkeypatch.delenv("NOAUTH_LOG_LEVEL")
+        log.configure()
@@ -0,0 +1,40 @@
+import json
+
+from noauth import jwt
+
+
+def decode(token: str) -> dict:
+    return json.loads(jwt.base64_urldecode_no_padding(token.split(".")[1]))
+
+
+def test_api_tokens_batch(client):
+    response = client.post(
+        "/manual/api/tokens",
+        json={"claims": [{"sub": "alice"}, {"sub": "bob"}], "valid_for": 60},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    payloads = [decode(json.loads(line)["token"]) for line in response.iter_lines()]
+    assert [payload["sub"] for payload in payloads] == ["alice", "bob"]
+    assert payloads[0]["jti"] != payloads[1]["jti"]
+    for payload in payloads:
+        assert payload["iss"] == "http://noauth"
+        assert payload["scope"] == "demo"
+        assert payload["exp"] - payload["iat"] == 60
+
+
+def test_api_token_reuse(client):
+    first = client.get("/manual/api/token", params={"sub": "alice", "reuse": "true"})
+    again = client.get("/manual/api/token", params={"reuse": "true", "sub": "alice"})
+    assert first.json()["token"] == again.json()["token"]
+    assert "reuse" not in decode(first.json()["token"])
+
+    other = client.get("/manual/api/token", params={"sub": "bob", "reuse": "true"})
+    fresh = client.get("/manual/api/token", params={"sub": "alice"})
+    assert other.json()["token"] != first.json()["token"]
+    assert fresh.json()["token"] != first.json()["token"]
+
+    metrics = client.get("/metrics").text
+    assert "noauth_token_cache_hits_total 1" in metrics
+    assert "noauth_token_cache_misses_total 2" in metrics
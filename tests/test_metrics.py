@@ -0,0 +1,24 @@
+from noauth.metrics import Histogram
+
+
+def test_histogram_render():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+    assert list(histogram.render("x", 'route="/a"')) == [
+        'x_bucket{route="/a",le="0.1"} 1',
+        'x_bucket{route="/a",le="1.0"} 3',
+        'x_bucket{route="/a",le="+Inf"} 4',
+        'x_sum{route="/a"} 6.05',
+        'x_count{route="/a"} 4',
+    ]
+
+
+def test_metrics_endpoint(client):
+    client.get("/manual/api/token")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    text = response.text
+    assert 'noauth_request_duration_seconds_count{route="/manual/api/token"}' in text
+    assert "noauth_jwt_sign_duration_seconds_count " in text
+    assert "noauth_store_entries 0" in text
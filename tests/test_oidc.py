@@ -0,0 +1,222 @@
+import json
+import re
+from urllib.parse import parse_qs, urlparse
+
+from noauth import jwt
+
+
+def authorize(client, scope: str = "openid") -> str:
+    response = client.get(
+        "/oidc/authorize",
+        params={
+            "response_type": "code",
+            "client_id": "example",
+            "redirect_uri": "http://rp/callback",
+            "scope": scope,
+            "state": "xyz",
+        },
+    )
+    assert response.status_code == 200
+    match = re.search(r"/oidc/submit/([0-9a-f-]+)", response.text)
+    assert match
+    return match.group(1)
+
+
+def submit(client, id: str, claims: dict) -> dict:
+    response = client.post(
+        f"/oidc/submit/{id}", data={"claims": json.dumps(claims)}, follow_redirects=False
+    )
+    assert response.status_code == 303
+    return {
+        k: v[0] for k, v in parse_qs(urlparse(response.headers["location"]).query).items()
+    }
+
+
+def redeem(client, code: str):
+    return client.post(
+        "/oidc/token",
+        data={
+            "grant_type": "authorization_code",
+            "client_id": "example",
+            "client_secret": "supersecret",
+            "redirect_uri": "http://rp/callback",
+            "code": code,
+        },
+    )
+
+
+def test_code_flow(client):
+    id = authorize(client)
+    query = submit(client, id, {"sub": "alice", "email": "alice@example.com"})
+    assert query["state"] == "xyz"
+
+    response = redeem(client, query["code"])
+    assert response.status_code == 200
+    body = response.json()
+    payload = json.loads(jwt.base64_urldecode_no_padding(body["id_token"].split(".")[1]))
+    assert payload["email"] == "alice@example.com"
+    assert payload["aud"] == "example"
+    assert payload["iss"] == "http://noauth"
+
+
+def test_discovery_cached(client):
+    response = client.get("/.well-known/openid-configuration")
+    assert response.status_code == 200
+    assert response.json()["issuer"] == "http://noauth"
+    assert "max-age=" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+
+    response = client.get(
+        "/.well-known/openid-configuration", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_jwks_cached(client):
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    (jwk,) = response.json()["keys"]
+    assert jwk["kid"]
+    etag = response.headers["etag"]
+
+    response = client.get(
+        "/.well-known/jwks.json", headers={"If-None-Match": 'W/"x", ' + etag}
+    )
+    assert response.status_code == 304
+    response = client.get("/.well-known/jwks.json", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+def test_headless_authorize(client):
+    response = client.get(
+        "/oidc/authorize",
+        params={
+            "response_type": "code",
+            "client_id": "example",
+            "redirect_uri": "http://rp/callback",
+            "scope": "openid test",
+            "state": "xyz",
+            "prompt": "none",
+            "login_hint": "bob",
+            "claims": json.dumps({"email": "bob@example.com"}),
+        },
+        follow_redirects=False,
+    )
+    assert response.status_code == 303
+    location = urlparse(response.headers["location"])
+    assert location.netloc == "rp"
+    query = {k: v[0] for k, v in parse_qs(location.query).items()}
+    assert query["state"] == "xyz"
+
+    body = redeem(client, query["code"]).json()
+    payload = json.loads(jwt.base64_urldecode_no_padding(body["id_token"].split(".")[1]))
+    assert payload["sub"] == "bob"
+    assert payload["email"] == "bob@example.com"
+    assert payload["given_name"] == "Alice"
+    assert payload["test"] == "asdf"
+
+
+def test_code_is_single_use(client):
+    id = authorize(client)
+    query = submit(client, id, {"sub": "alice"})
+    assert redeem(client, query["code"]).status_code == 200
+    assert redeem(client, query["code"]).status_code == 404
+
+    response = client.post(
+        f"/oidc/submit/{id}", data={"claims": "{}"}, follow_redirects=False
+    )
+    assert response.status_code == 403
+
+
+def test_userinfo_and_introspect(client):
+    query = submit(client, authorize(client), {"sub": "alice", "email": "a@example.com"})
+    at = redeem(client, query["code"]).json()["access_token"]
+
+    response = client.get("/oidc/userinfo", headers={"Authorization": f"Bearer {at}"})
+    assert response.status_code == 200
+    assert response.json() == {"sub": "alice", "email": "a@example.com"}
+
+    response = client.get("/oidc/userinfo", headers={"Authorization": "Bearer nope"})
+    assert response.status_code == 401
+
+    response = client.post("/oidc/introspect", data={"token": at})
+    assert response.status_code == 401
+    response = client.post(
+        "/oidc/introspect", data={"token": at}, auth=("example", "wrong")
+    )
+    assert response.status_code == 401
+
+    body = client.post(
+        "/oidc/introspect", data={"token": at}, auth=("example", "supersecret")
+    ).json()
+    assert body["active"] is True
+    assert body["sub"] == "alice"
+    assert body["client_id"] == "example"
+    assert client.post(
+        "/oidc/introspect",
+        data={"token": "nope", "client_id": "example", "client_secret": "supersecret"},
+    ).json() == {"active": False}
+
+    discovery = client.get("/.well-known/openid-configuration").json()
+    assert discovery["userinfo_endpoint"] == "http://noauth/oidc/userinfo"
+    assert discovery["introspection_endpoint"] == "http://noauth/oidc/introspect"
+
+
+def test_client_credentials(client):
+    response = client.post(
+        "/oidc/token",
+        data={
+            "grant_type": "client_credentials",
+            "client_id": "example",
+            "client_secret": "supersecret",
+        },
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert "refresh_token" not in body
+    payload = json.loads(
+        jwt.base64_urldecode_no_padding(body["access_token"].split(".")[1])
+    )
+    assert payload["sub"] == "example"
+    assert payload["scope"] == "demo"
+    assert client.post(
+        "/oidc/introspect",
+        data={"token": body["access_token"]},
+        auth=("example", "supersecret"),
+    ).json()["active"]
+
+
+def test_refresh_token_requires_offline_access(client):
+    query = submit(client, authorize(client), {"sub": "alice"})
+    assert "refresh_token" not in redeem(client, query["code"]).json()
+
+
+def test_refresh_token(client):
+    query = submit(client, authorize(client, "openid offline_access"), {"sub": "alice"})
+    body = redeem(client, query["code"]).json()
+    rt = body["refresh_token"]
+    auth_time = json.loads(
+        jwt.base64_urldecode_no_padding(body["id_token"].split(".")[1])
+    )["auth_time"]
+
+    def refresh(rt: str):
+        return client.post(
+            "/oidc/token",
+            data={
+                "grant_type": "refresh_token",
+                "client_id": "example",
+                "client_secret": "supersecret",
+                "refresh_token": rt,
+            },
+        )
+
+    response = refresh(rt)
+    assert response.status_code == 200
+    body = response.json()
+    payload = json.loads(jwt.base64_urldecode_no_padding(body["id_token"].split(".")[1]))
+    assert payload["sub"] == "alice"
+    assert payload["auth_time"] == auth_time
+    assert body["refresh_token"] != rt
+    assert refresh(rt).status_code == 400
+    assert refresh(body["refresh_token"]).status_code == 200
@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from noauth import dependencies
+
+
+def test_reload_swaps_config(client):
+    kid = client.get("/.well-known/jwks.json").json()["keys"][0]["kid"]
+    etag = client.get("/.well-known/openid-configuration").headers["etag"]
+
+    config = Path("noauth.toml")
+    config.write_text(config.read_text().replace('"http://noauth"', '"http://reloaded"'))
+
+    assert dependencies.reload()
+
+    response = client.get("/.well-known/openid-configuration")
+    assert response.json()["issuer"] == "http://reloaded"
+    assert response.headers["etag"] != etag
+    assert client.get("/.well-known/jwks.json").json()["keys"][0]["kid"] == kid
+
+
+def test_reload_invalid_keeps_config(client):
+    Path("noauth.toml").write_text("[noauth.oidc]\n")
+
+    assert not dependencies.reload()
+    response = client.get("/.well-known/openid-configuration")
+    assert response.json()["issuer"] == "http://noauth"
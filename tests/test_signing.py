@@ -0,0 +1,30 @@
+import asyncio
+import json
+
+import pytest
+from aries_askar import Key, KeyAlg
+
+from noauth import jwt
+from noauth.metrics import SIGN_SECONDS
+from noauth.signing import SigningExecutor
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["inline", "thread", "process"])
+async def test_executor_signs(kind):
+    key = Key.generate(KeyAlg.P256)
+    signer = jwt.Signer(key, "ES256")
+    executor = SigningExecutor(kind, workers=2, batch_size=4)
+    count = sum(SIGN_SECONDS.counts)
+    try:
+        tokens = await asyncio.gather(
+            *(executor.sign(signer, {"n": n}) for n in range(10))
+        )
+    finally:
+        executor.close()
+    assert sum(SIGN_SECONDS.counts) == count + 10
+
+    for n, token in enumerate(tokens):
+        enc_headers, enc_payload, _ = token.split(".")
+        assert enc_headers == signer.enc_headers
+        assert json.loads(jwt.base64_urldecode_no_padding(enc_payload)) == {"n": n}
@@ -0,0 +1,33 @@
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from noauth.dependencies import setup
+from noauth.routing import LazyRoutes
+from noauth.templates import TEMPLATES_DIR, compile_templates
+
+
+def test_startup_phases_exported(client):
+    text = client.get("/metrics").text
+    for phase in ("imports", "config", "store", "keys", "total"):
+        assert f'noauth_startup_seconds{{phase="{phase}"}}' in text
+
+
+def test_lazy_routes(client, monkeypatch):
+    monkeypatch.delitem(sys.modules, "noauth.manual")
+    app = FastAPI(lifespan=setup)
+    app.router.routes.append(LazyRoutes("/manual", "noauth.manual"))
+    with TestClient(app) as lazy:
+        assert "noauth.manual" not in sys.modules
+        assert lazy.get("/manualx").status_code == 404
+        assert lazy.get("/manual/api/token").status_code == 200
+        assert "noauth.manual" in sys.modules
+        assert lazy.get("/manual/nope").status_code == 404
+
+
+def test_compile_templates(tmp_path):
+    compile_templates(tmp_path)
+    assert len(list(tmp_path.glob("tmpl_*.py"))) == len(
+        list(TEMPLATES_DIR.glob("*.html"))
+    )
@@ -0,0 +1,280 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+import pytest_asyncio
+
+from noauth.sqlite_store import SQLiteKVStore
+from noauth.store import TemporalKVStore, TimingWheelKVStore, approximate_size
+
+
+@pytest_asyncio.fixture
+async def kv():
+    store = await TemporalKVStore().open()
+    yield store
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_get_expired_is_lazy(kv: TemporalKVStore):
+    await kv.set("key", "value", 0.05)
+    kv.expiry_task.cancel()
+    await asyncio.sleep(0.06)
+    assert "key" in kv.store
+    assert await kv.get("key") is None
+    assert "key" not in kv.store
+
+
+@pytest.mark.asyncio
+async def test_reset_not_evicted_by_stale_entry(kv: TemporalKVStore):
+    await kv.set("key", "old", 0.05)
+    await kv.set("key", "new", 10)
+    await asyncio.sleep(0.1)
+    assert await kv.get("key") == "new"
+    assert len(kv.expiry_heap) == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_then_set(kv: TemporalKVStore):
+    await kv.set("key", "old", 0.05)
+    await kv.delete("key")
+    assert await kv.get("key") is None
+    await kv.set("key", "new", 10)
+    await asyncio.sleep(0.1)
+    assert await kv.get("key") == "new"
+
+
+@pytest.mark.asyncio
+async def test_expiry_loop_reclaims(kv: TemporalKVStore):
+    await kv.set("short", 1, 0.05)
+    await kv.set("long", 2, 10)
+    await asyncio.sleep(0.1)
+    assert "short" not in kv.store
+    assert [key for _, _, key in kv.expiry_heap] == ["long"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_access(kv: TemporalKVStore):
+    async def worker(n: int):
+        for i in range(100):
+            key = f"{n}:{i % 10}"
+            await kv.set(key, i, 10)
+            assert await kv.get(key) == i
+            if i % 3 == 0:
+                await kv.delete(key)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(worker(n) for n in range(10)))
+    for n in range(10):
+        for i in range(10):
+            key = f"{n}:{i}"
+            value = await kv.get(key)
+            assert value is None or value % 10 == i
+
+
+@pytest.mark.asyncio
+async def test_max_entries_evicts_soonest_expiry():
+    kv = await TemporalKVStore(max_entries=2).open()
+    await kv.set("a", 1, 10)
+    await kv.set("b", 2, 5)
+    await kv.set("c", 3, 20)
+    assert await kv.get("b") is None
+    assert await kv.get("a") == 1
+    assert await kv.get("c") == 3
+    assert kv.stats()["evictions"] == 1
+    await kv.close()
+
+
+@pytest.mark.asyncio
+async def test_max_entries_evicts_lru():
+    kv = await TemporalKVStore(max_entries=2, eviction="lru").open()
+    await kv.set("a", 1, 10)
+    await kv.set("b", 2, 10)
+    await kv.get("a")
+    await kv.set("c", 3, 10)
+    assert await kv.get("b") is None
+    assert await kv.get("a") == 1
+    assert await kv.get("c") == 3
+    await kv.close()
+
+
+@pytest.mark.asyncio
+async def test_max_bytes():
+    kv = await TemporalKVStore(max_bytes=10_000).open()
+    for i in range(100):
+        await kv.set(f"key:{i}", "x" * 1000, 10)
+    stats = kv.stats()
+    assert 0 < stats["bytes"] <= 10_000
+    assert stats["entries"] + stats["evictions"] == 100
+    await kv.close()
+
+
+@pytest.mark.asyncio
+async def test_unbounded_store_skips_sizing(kv: TemporalKVStore, monkeypatch):
+    def fail(value):
+        raise AssertionError("sized without max_bytes")
+
+    monkeypatch.setattr("noauth.store.approximate_size", fail)
+    await kv.set("key", {"claims": ["x"] * 100}, 10)
+    assert kv.stats()["bytes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_heap_compaction(kv: TemporalKVStore):
+    for i in range(2000):
+        await kv.set(f"key:{i}", i, 10)
+    for i in range(1500):
+        await kv.delete(f"key:{i}")
+    stats = kv.stats()
+    assert stats["compactions"] == 1
+    assert stats["heap_size"] < 2000
+    assert await kv.get("key:1999") == 1999
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_shared(tmp_path):
+    path = tmp_path / "store.db"
+    one = await SQLiteKVStore(path).open()
+    two = await SQLiteKVStore(path).open()
+
+    await one.set("key", {"a": 1}, 10)
+    assert await two.get("key") == {"a": 1}
+    await two.set("key", {"a": 2}, 10)
+    assert await one.get("key") == {"a": 2}
+    await one.delete("key")
+    assert await two.get("key") is None
+
+    await one.set("short", 1, 0.01)
+    await asyncio.sleep(0.02)
+    assert await two.get("short") is None
+    assert await two._run(two._sweep) == 1
+
+    await one.close()
+    await two.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_lock_wait_does_not_block_loop(tmp_path):
+    path = tmp_path / "store.db"
+    kv = await SQLiteKVStore(path).open()
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    write = asyncio.create_task(kv.set("key", 1, 10))
+    start = time.perf_counter()
+    await asyncio.sleep(0.05)
+    assert time.perf_counter() - start < 0.5
+    assert not write.done()
+
+    other.execute("COMMIT")
+    await write
+    assert await kv.get("key") == 1
+    other.close()
+    await kv.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_sweep_error_does_not_kill_expiry(tmp_path, monkeypatch):
+    kv = SQLiteKVStore(tmp_path / "store.db", sweep_interval=0.01)
+    sweep = kv._sweep
+    failures = [sqlite3.OperationalError("database is locked")]
+
+    def flaky_sweep():
+        if failures:
+            raise failures.pop()
+        return sweep()
+
+    monkeypatch.setattr(kv, "_sweep", flaky_sweep)
+    await kv.open()
+    await kv.set("short", 1, 0.01)
+    await asyncio.sleep(0.1)
+    assert not kv.expiry_task.done()
+    assert kv.stats()["sweep_errors"] == 1
+    assert kv.stats()["expirations"] == 1
+    await kv.close()
+
+
+@pytest.mark.asyncio
+async def test_pop(kv: TemporalKVStore, tmp_path):
+    sqlite = await SQLiteKVStore(tmp_path / "store.db").open()
+    for store in (kv, sqlite):
+        await store.set("key", [1], 10)
+        assert await store.pop("key") == [1]
+        assert await store.pop("key") is None
+        assert await store.get("key") is None
+    await sqlite.close()
+
+
+@pytest.mark.asyncio
+async def test_timing_wheel():
+    kv = await TimingWheelKVStore(tick=0.02).open()
+    await kv.set("short", 1, 0.03)
+    await kv.set("long", 2, 10)
+    await kv.set("reset", 3, 0.03)
+    await kv.set("reset", 4, 10)
+    await kv.set("deleted", 5, 10)
+    await kv.delete("deleted")
+    assert await kv.get("reset") == 4
+
+    await asyncio.sleep(0.1)
+    assert set(kv.store) == {"long", "reset"}
+    assert sum(len(bucket) for bucket in kv.buckets.values()) == 2
+    assert kv.stats()["expirations"] == 1
+    assert await kv.get("reset") == 4
+    await kv.close()
+
+
+@pytest.mark.asyncio
+async def test_timing_wheel_evicts_soonest():
+    kv = await TimingWheelKVStore(max_entries=2, tick=0.5).open()
+    await kv.set("a", 1, 10)
+    await kv.set("b", 2, 5)
+    await kv.set("c", 3, 20)
+    assert set(kv.store) == {"a", "c"}
+    await kv.close()
+
+
+@pytest.mark.asyncio
+async def test_timing_wheel_expires_only_due_buckets():
+    kv = await TimingWheelKVStore(tick=1.0).open()
+    now = time.time()
+    for i in range(1000):
+        await kv.set(f"key:{i}", i, 100 + i)
+    await kv.delete("key:0")
+    assert len(kv.buckets) == 999
+    assert len(kv.tick_heap) >= 999
+
+    kv._expire(now + 110)
+    assert len(kv.store) + kv.stats()["expirations"] == 999
+    assert min(kv.tick_heap) > int((now + 110) // kv.tick)
+    assert kv._next_expiry() == min(kv.buckets) * kv.tick
+
+    kv._expire(now + 2000)
+    assert not kv.store and not kv.buckets and not kv.tick_heap
+    await kv.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("store_class", [TemporalKVStore, TimingWheelKVStore])
+async def test_new_entry_with_shortest_ttl_not_evicted(store_class):
+    kv = await store_class(max_entries=2).open()
+    await kv.set("a", 1, 3600)
+    await kv.set("b", 2, 86400)
+    await kv.set("flow", 3, 30)
+    assert await kv.get("flow") == 3
+    assert await kv.get("a") is None
+    assert kv.stats()["evictions"] == 1
+    await kv.close()
+
+
+@pytest.mark.asyncio
+async def test_oversized_entry_rejected():
+    kv = await TemporalKVStore(max_bytes=1000).open()
+    await kv.set("small", 1, 10)
+    await kv.set("big", "x" * 2000, 10)
+    assert await kv.get("big") is None
+    assert await kv.get("small") == 1
+    assert kv.stats()["rejections"] == 1
+    assert kv.bytes == approximate_size("small") + approximate_size(1)
+    await kv.close()
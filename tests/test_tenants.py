@@ -0,0 +1,86 @@
+import json
+from pathlib import Path
+import re
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from noauth import dependencies, jwt
+
+TENANTS = """
+[noauth.tenants.acme.oidc]
+issuer = "http://noauth/t/acme"
+
+[noauth.tenants.acme.client]
+client_id = "example"
+client_secret = "supersecret"
+
+[noauth.tenants.acme.default]
+sub = "bob"
+email = "bob@acme.example"
+"""
+
+
+@pytest.fixture
+def tenants(client):
+    config = Path("noauth.toml")
+    config.write_text(config.read_text() + TENANTS)
+    assert dependencies.reload()
+    return client
+
+
+def test_tenant_documents(tenants):
+    discovery = tenants.get("/t/acme/.well-known/openid-configuration").json()
+    assert discovery["issuer"] == "http://noauth/t/acme"
+    assert discovery["token_endpoint"] == "http://noauth/t/acme/oidc/token"
+
+    root = tenants.get("/.well-known/jwks.json").json()["keys"][0]
+    acme = tenants.get("/t/acme/.well-known/jwks.json").json()["keys"][0]
+    assert root["kid"] != acme["kid"]
+
+
+def test_unknown_tenant(tenants):
+    response = tenants.get("/t/nope/.well-known/openid-configuration")
+    assert response.status_code == 404
+
+
+def test_tenant_code_flow(tenants):
+    response = tenants.get(
+        "/t/acme/oidc/authorize",
+        params={
+            "response_type": "code",
+            "client_id": "example",
+            "redirect_uri": "http://rp/callback",
+            "scope": "openid",
+            "state": "xyz",
+        },
+    )
+    assert response.status_code == 200
+    match = re.search(
+        r'action="http://testserver(/t/acme/oidc/submit/[^"]+)"', response.text
+    )
+    assert match
+
+    response = tenants.post(
+        match.group(1),
+        data={"claims": json.dumps({"sub": "bob"})},
+        follow_redirects=False,
+    )
+    code = parse_qs(urlparse(response.headers["location"]).query)["code"][0]
+
+    # Flows are namespaced per tenant
+    data = {
+        "grant_type": "authorization_code",
+        "client_id": "example",
+        "client_secret": "supersecret",
+        "redirect_uri": "http://rp/callback",
+        "code": code,
+    }
+    assert tenants.post("/oidc/token", data=data).status_code == 404
+
+    response = tenants.post("/t/acme/oidc/token", data=data)
+    assert response.status_code == 200
+    id_token = response.json()["id_token"]
+    payload = json.loads(jwt.base64_urldecode_no_padding(id_token.split(".")[1]))
+    assert payload["iss"] == "http://noauth/t/acme"
+    assert payload["sub"] == "bob"
@@ -0,0 +1,20 @@
+from noauth.token_cache import TokenCache
+
+
+def test_reuse_while_fresh():
+    cache = TokenCache(min_remaining=0.5)
+    key = cache.key({"sub": "alice"}, 100, "http://noauth", "kid")
+    cache.put(key, "token", 1000, 1100)
+    assert cache.get(key, 1040) == "token"
+    assert cache.get(key, 1060) is None
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 1}
+
+
+def test_canonical_key_and_lru():
+    cache = TokenCache(max_entries=2)
+    assert cache.key({"a": 1, "b": 2}, 60, "i", "k") == cache.key(
+        {"b": 2, "a": 1}, 60, "i", "k"
+    )
+    for name in ("a", "b", "c"):
+        cache.put(name, name, 0, 100)
+    assert list(cache.tokens) == ["b", "c"]